@@ -10,12 +10,17 @@ import load_est.psse as psse
 # psse = reload(psse)
 import load_est.constants as constants
 # constants = reload(constants)
+import load_est.export_service as export_service
+import load_est.segmentation as segmentation
+import load_est.validation as validation
+import load_est.log_handlers as log_handlers
+import load_est.psspy_profiler as psspy_profiler
 import logging
 import collections
 import time
 import numpy as np
 import math
-import dill
+import json
 import pandas as pd
 pd.options.display.width = 0
 
@@ -26,96 +31,211 @@ os.environ['PATH'] += ';' + os_path_PSSE
 os.environ['PATH'] += ';' + sys_path_PSSE
 # noinspection PyUnresolvedReferences
 import psspy  # noqa
+# calls are recorded if psspy profiling has been switched on
+psspy = psspy_profiler.wrap(psspy)
 
 # enables correct logging when functions called from GUI
 logger = logging.getLogger(constants.Logging.logger_name)
 
 
-class Station:
+class StationTable(object):
+	"""
+	Columnar table of the values of every station, shared by all of the station objects which are views of a single
+	row of the table
+	"""
+	__slots__ = (
+		'gsp_header', 'nrn_header', 'name_header', 'peak_mw_header', 'years', 'seasons', 'buses',
+		'st_type', 'gsp', 'nrn', 'name', 'peak_mw', 'pf', 'load_forecast', 'seasonal_percent', 'bus_no', 'bus_pc',
+		'parent', 'gsp_scalable', 'idv_scalable', 'load_percentage', 'load_forecast_diverse_fac'
+	)
+	# attributes which are saved as text, all others are numeric arrays
+	text_attributes = (
+		'gsp_header', 'nrn_header', 'name_header', 'peak_mw_header', 'years', 'seasons', 'buses',
+		'st_type', 'gsp', 'nrn', 'name'
+	)
+	object_arrays = ('st_type', 'gsp', 'nrn', 'name')
 
-	def __init__(self, df, st_type):
+	def __init__(self, df, parent):
 		"""
-		Station class init function to initialise station object properties
-		:param pd.Dataframe() df_fr: dataframe containing one station information from excel spreadsheet
-		:param st_type: either 'BSP' or 'Primary'
+		Initialise the table from the rows of the station table for the stations to be created
+		:param pd.Dataframe() df: rows of the station table from station_table()
+		:param np.array parent: row of the upstream station for each row or -1 if there is no upstream station
 		"""
+		c = constants.XlFileConstants
+
+		# column headers from the excel spreadsheet
+		self.gsp_header, self.nrn_header, self.name_header = df[c.station_group].columns
+		self.peak_mw_header = df[c.peak_mw_check].columns[0]
+		self.years = list(df[c.load_forecast_check].columns)
+		self.seasons = list(df[c.seasonal_percent_check].columns)
+		self.buses = list(df[c.psse_buses_check].columns)
+
+		# station values, one row per station
+		self.st_type = df.index.get_level_values(c.station_table_index[1]).values
+		self.gsp = df[(c.station_group, self.gsp_header)].values
+		self.nrn = df[(c.station_group, self.nrn_header)].values
+		self.name = df[(c.station_group, self.name_header)].values
+		self.peak_mw = self.numeric(df[c.peak_mw_check])[:, 0]
+		self.pf = self.numeric(df[c.pf_group])[:, 0]
+		self.load_forecast = self.numeric(df[c.load_forecast_check])
+		self.seasonal_percent = self.numeric(df[c.seasonal_percent_check])
+		self.bus_no = self.numeric(df[c.psse_buses_check])
+		self.bus_pc = self.numeric(df[c.psse_pc_group])
+
+		# station hierarchy and values calculated once the stations are created
+		self.parent = np.asarray(parent, dtype=int)
+		self.gsp_scalable = np.ones(len(df.index), dtype=bool)
+		self.idv_scalable = np.ones(len(df.index), dtype=bool)
+		self.load_percentage = np.full(len(df.index), np.nan)
+		self.load_forecast_diverse_fac = np.full(len(df.index), np.nan)
+
+	@staticmethod
+	def numeric(df):
+		"""
+		Function to convert a group of columns to a float array, anything which is not a number becomes NaN
+		:param pd.Dataframe() df: columns to convert
+		:return np.array: 2D array of values
+		"""
+		return df.apply(pd.to_numeric, errors='coerce').values.astype(float)
 
-		# reset index to ensure first row is row zero to be able to use iloc later
-		df.reset_index(drop=True, inplace=True)
-		# create a copy of the full data frame
-		self.df = df.copy()
-		# create a dataframe of the first row only
-		df_fr = df.iloc[0].copy()
-
-		# Initialise station type
-		self.st_type = st_type
-
-		# TODO: Initialise season load estimates
-		self.spring_load=float # these are based on percentile values of provided values and are used to fill in missing season load values
-		self.summer_load=float
-		self.min_load=float
-
-		# Initialise gsp col dictionary
-		self.gsp = df_fr.iat[constants.XlFileConstants.gsp_col_no]# n: its 0, which gives the gsp name
-		self.gsp_col = {df_fr.index[constants.XlFileConstants.gsp_col_no]: df_fr.iat[constants.XlFileConstants.gsp_col_no]}
-
-		# Initialise name col dictionary
-		self.name_val = df_fr.iat[constants.XlFileConstants.name_col_no]
-		self.name = {df_fr.index[constants.XlFileConstants.name_col_no]: df_fr.iat[constants.XlFileConstants.name_col_no]}
+	def save(self, pth):
+		"""
+		Function to save the table to a numpy .npz file, text values are saved as JSON so that their types are kept
+		:param str pth: full path of the file to create
+		:return:
+		"""
+		text = dict((attr, getattr(self, attr)) for attr in self.text_attributes)
+		for attr in self.object_arrays:
+			text[attr] = text[attr].tolist()
+		arrays = dict(
+			(attr, getattr(self, attr)) for attr in self.__slots__ if attr not in self.text_attributes)
+		arrays[constants.SavedParamsStrings.text_str] = np.array(
+			json.dumps(text, default=lambda x: x.item() if hasattr(x, 'item') else str(x)))
 
-		# Initialise nrn col dictionary
-		self.nrn = {df_fr.index[constants.XlFileConstants.nrn_col_no]: df_fr.iat[constants.XlFileConstants.nrn_col_no]}
+		with open(pth, 'wb') as f:
+			np.savez_compressed(f, **arrays)
 
-		# # Initialise growth_rate col dictionary
-		# self.growth_rate_key_val = df_fr.iat[Constants.growth_rate_col]
-		# self.growth_rate_key = {df_fr.index[Constants.growth_rate_col]: df_fr.iat[Constants.growth_rate_col]}
+		return None
 
-		# Initialise peak_mw col dictionary
-		self.peak_mw_val = df_fr.iat[constants.XlFileConstants.peak_mw_col]
-		self.peak_mw_dict = {df_fr.index[constants.XlFileConstants.peak_mw_col]: df_fr.iat[constants.XlFileConstants.peak_mw_col]}
+	@classmethod
+	def load(cls, pth):
+		"""
+		Function to load a table saved with save()
+		:param str pth: full path of the file
+		:return StationTable:
+		"""
+		table = cls.__new__(cls)
+		with np.load(pth) as data:
+			text = json.loads(data[constants.SavedParamsStrings.text_str].item())
+			for attr in cls.__slots__:
+				if attr in cls.object_arrays:
+					setattr(table, attr, np.array(text[attr], dtype=object))
+				elif attr in cls.text_attributes:
+					setattr(table, attr, text[attr])
+				else:
+					setattr(table, attr, data[attr])
 
-		# Initialise power factor dictionary - default power factor of 1
-		self.set_pf(1)
+		return table
 
-		self.gsp_diverse_forecast_dict = dict() # n: why is this defined here?
-		self.gsp_aggregate_forecast_dict = dict()
-		self.load_forecast_dict = dict()
+	def children(self, idx):
+		"""
+		Function to return the rows of the stations downstream of a station
+		:param int idx: row of the station
+		:return np.array: rows of the downstream stations in the order they were added
+		"""
+		return np.flatnonzero(self.parent == idx)
 
-		if self.st_type == constants.XlFileConstants.gsp_type: # is it's a gsp
-			# extract gsp power factor
-			gsp_pf = df.iat[constants.XlFileConstants.pf_cell_tuple]
-			if not np.isnan(gsp_pf):
-				self.set_pf(gsp_pf)
-			self.gsp_scalable = True #
+	def calc_load_percentages(self, rows):
+		"""
+		Function to calculate the load forecast of each station as the total of its substations, the diversity factor
+		of each station and the percentage of the load each substation has, all stations are calculated in one pass
+		:param list rows: rows of the stations to calculate
+		:return:
+		"""
+		rows = np.asarray(rows, dtype=int)
+		children = np.flatnonzero(np.in1d(self.parent, rows))
+		parent = self.parent[children]
 
-			# gsp_div_agg_df = df.loc[0:1, df.columns[Constants.load_forecast_col_range]]
-			# gsp_div_agg_idx = ['Diverse', 'Aggregate']
-			# gsp_div_agg_df.index = gsp_div_agg_idx
-			# self.gsp_diverse_forecast_dict = gsp_div_agg_df.loc['Diverse'].to_dict()
-			# self.gsp_aggregate_forecast_dict = gsp_div_agg_df.loc['Aggregate'].to_dict()
+		# total of each year for each station, missing values are ignored
+		load_forecast = self.load_forecast[children]
+		totals = np.zeros((len(self.parent), len(self.years)))
+		np.add.at(totals, parent, np.where(np.isnan(load_forecast), 0, load_forecast))
 
-		else:
+		# the diversity factor and the percentages are based on the first year
+		self.load_forecast[rows] = totals[rows]
+		with np.errstate(divide='ignore', invalid='ignore'):
+			self.load_forecast_diverse_fac[rows] = self.peak_mw[rows] / totals[rows, 0]
+			self.load_percentage[children] = load_forecast[:, 0] / totals[parent, 0]
 
-			self.idv_scalable = True #
-			self.load_percentage = float #
+		return None
 
-		# Initialise name of upstream station as empty dictionary
-		self.name_up = dict()
 
-		self.load_forecast_dict = df_fr.iloc[constants.XlFileConstants.load_forecast_col_range].to_dict()# what is the key for this dictionary years?or column number sor??
-		self.seasonal_percent_dict = df_fr.iloc[constants.XlFileConstants.seasonal_percent_col_range].to_dict()
-		self.seasonal_percent_dict['Maximum Demand'] = 1 # 1 means 100%
+class Station(object):
+	"""
+	View of a single station in a StationTable, station values are read from and written to the shared table
+	"""
+	__slots__ = ('table', 'idx', 'parent', 'sub_stations_dict')
 
-		psse_busses_df = df.loc[0:1, df.columns[constants.XlFileConstants.psse_buses_col_range]] # intresting way of using.loc
-		psse_idx = ['bus_no', 'pc']
-		psse_busses_df.index = psse_idx
-		self.psse_buses_dict = psse_busses_df.to_dict()
+	def __init__(self, table, idx):
+		"""
+		Station class init function to initialise station object properties
+		:param StationTable table: table of station values
+		:param int idx: row of the station in the table
+		"""
+		self.table = table
+		self.idx = idx
 
-		# Initialise substation dictionary station as empty dictionary and number of substations to zero
+		# upstream station and substation dictionary are set when the station is added as a substation
+		self.parent = None
 		self.sub_stations_dict = dict()
-		self.no_sub_stations = len(self.sub_stations_dict)
 
-		self.load_forecast_diverse_fac = float
+	@property
+	def st_type(self):
+		return self.table.st_type[self.idx]
+
+	@property
+	def gsp(self):
+		return self.table.gsp[self.idx]
+
+	@property
+	def gsp_col(self):
+		# inherit gsp col from the upstream station
+		if self.parent is not None:
+			return self.parent.gsp_col
+		return {self.table.gsp_header: self.gsp}
+
+	@property
+	def name_val(self):
+		return self.table.name[self.idx]
+
+	@property
+	def name(self):
+		return {self.table.name_header: self.name_val}
+
+	@property
+	def name_up(self):
+		if self.parent is not None:
+			return self.parent.name
+		return dict()
+
+	@property
+	def nrn(self):
+		return {self.table.nrn_header: self.table.nrn[self.idx]}
+
+	@property
+	def peak_mw_val(self):
+		return self.table.peak_mw[self.idx]
+
+	@property
+	def peak_mw_dict(self):
+		return {self.table.peak_mw_header: self.peak_mw_val}
+
+	@property
+	def pf(self):
+		# inherit power factor from the upstream station
+		if self.parent is not None:
+			return self.parent.pf
+		return {constants.XlFileConstants.pf_str: self.table.pf[self.idx]}
 
 	def set_pf(self, pf):
 		"""
@@ -123,253 +243,74 @@ class Station:
 		:param pf: power factor value to set
 		:return:
 		"""
-		self.pf = {constants.XlFileConstants.pf_str: pf}
-
-	def add_sub_station(self, station_obj):
-		"""
-		Function to add a stations as a substation to a station object
-		:param station_obj: station object to be added a sub station
-		:return:
-		"""
-		# inherit gsp col and power factor from the upstream station
-		station_obj.gsp_col = self.gsp_col
-		station_obj.pf = self.pf
-
-		# set the name of upstream station as the upstream station name
-		station_obj.name_up = self.name
+		self.table.pf[self.idx] = pf
 
-		# add the station object to the substation dictionary and update the number of substations
-		self.sub_stations_dict.update({len(self.sub_stations_dict.keys()): station_obj})
-		self.no_sub_stations = len(self.sub_stations_dict)
-
-		return
+	@property
+	def load_forecast_dict(self):
+		return dict(zip(self.table.years, self.table.load_forecast[self.idx]))
 
-	def calc_load_percentages(self):
-		# this function calulates the percentage of loads each substation has
-		year_list = self.df.columns[constants.XlFileConstants.load_forecast_col_range].to_list()
-		year_list.sort()
+	@property
+	def seasonal_percent_dict(self):
+		return dict(zip(self.table.seasons, self.table.seasonal_percent[self.idx]))
 
-		peak_mw_df = pd.DataFrame(columns=year_list)  #what does this do make an empty dataframe with years as column?
+	@property
+	def psse_buses_dict(self):
+		return dict(
+			(bus, {'bus_no': bus_no if math.isnan(bus_no) else int(bus_no), 'pc': pc})
+			for bus, bus_no, pc in zip(self.table.buses, self.table.bus_no[self.idx], self.table.bus_pc[self.idx]))
 
-		for key, prim_stat in self.sub_stations_dict.iteritems():
-			# for counter, yr in enumerate(year_list):
-			# 	prim_stat.load_forecast_dict[yr] = \
-			# 		prim_stat.peak_mw_val * Constants.growth_rate_dict[prim_stat.growth_rate_key_val] ** counter
+	@property
+	def gsp_scalable(self):
+		return self.table.gsp_scalable[self.idx]
 
-			temp_df = pd.DataFrame([prim_stat.load_forecast_dict]) # what is prime stat laod forecast dict in terms of the excel sheet???
-			temp_df.index = [prim_stat.name_val]
-			peak_mw_df = peak_mw_df.append(temp_df)
+	@gsp_scalable.setter
+	def gsp_scalable(self, value):
+		self.table.gsp_scalable[self.idx] = value
 
-		peak_mw_df.loc['Column_Total'] = peak_mw_df.sum(numeric_only=True, axis=0)
+	@property
+	def idv_scalable(self):
+		return self.table.idv_scalable[self.idx]
 
-		self.load_forecast_dict = peak_mw_df.loc['Column_Total'].to_dict()
-		self.load_forecast_diverse_fac = self.peak_mw_val / peak_mw_df.loc['Column_Total', year_list[0]].item() # what does item do here? also isnt this calsulated in the spreadsheet by dividing L5/L6?
+	@idv_scalable.setter
+	def idv_scalable(self, value):
+		self.table.idv_scalable[self.idx] = value
 
-		for key, prim_stat in self.sub_stations_dict.iteritems():
+	@property
+	def load_percentage(self):
+		return self.table.load_percentage[self.idx]
 
-			prim_stat.load_percentage = peak_mw_df.loc[prim_stat.name_val, year_list[0]].item() / \
-				peak_mw_df.loc['Column_Total', year_list[0]].item()
+	@property
+	def load_forecast_diverse_fac(self):
+		return self.table.load_forecast_diverse_fac[self.idx]
 
-		return None
+	@property
+	def no_sub_stations(self):
+		return len(self.sub_stations_dict)
 
-	def scalable_indv_check(self):
-
-		# create temp dict to have just bus numbers not percentages also
-		psse_buses_check_dict = dict()
-		for key, sub_dict in self.psse_buses_dict.iteritems():
-			psse_buses_check_dict[key] = sub_dict['bus_no']
-
-		# concatenate relevant station properties, the following line first convert all dictionaries to dataframes then put them netx to each other to make a row dataframe
-		df = pd.concat([
-			pd.DataFrame([self.gsp_col]),
-			pd.DataFrame([self.nrn]),
-			pd.DataFrame([self.name]),
-			pd.DataFrame([self.peak_mw_dict]),
-			pd.DataFrame([self.pf]),
-			pd.DataFrame([self.load_forecast_dict]),
-			pd.DataFrame([psse_buses_check_dict])],
-			axis=1,
-		)# put all station data ina row dataframe with the name of the variables as headers and zero index
-
-		check_cols = list()
-		#todo:
-		#estimate_cols=list()
-
-		# check that MW Peak is a number greater than zero
-		col_select = self.peak_mw_dict.keys()
-		col_name = 'peak_mw' + '_pass'
-
-		#col_est_name='peak_mw' + '_est'
-
-		check_cols.append(col_name)
-		#etimate_check_cols.append(col_est_name)
-
-		df.loc[:, col_name] = True
-		#df.loc[:, col_est_name] = False
-		#this checks if the peak MW value is missing or if it's smaller than 0
-		df.loc[df[df[col_select].le(0).any(1)].index, col_name] = False
-		df.loc[df[df[col_select].isnull().any(1)].index, col_name] = False
-
-		# todo: change the false for MW check back to true if it's a GSP as the MW of the GSP does not matter for the SSE load setting
-		# if self.st_type == constants.XlFileConstants.gsp_type:
-		# 	df.loc[:, col_name] = True
-		# 	df.loc[:, col_est_name] = True
-
-		# check load_forecast_dict is not null or negative
-		col_select = self.load_forecast_dict.keys()
-		col_name = 'load_forecast' + '_pass'
-		#col_est_name = 'load_forecast' + '_est'
-
-		check_cols.append(col_name)
-		#etimate_check_cols.append(col_est_name)
-
-		df.loc[:, col_name] = True
-		# df.loc[:, col_est_name] = False
-
-		df.loc[df[df[col_select].le(0).any(1)].index, col_name] = False
-		df.loc[df[df[col_select].isnull().any(1)].index, col_name] = False
-		# todo: if a new amend class in constant file is having its attribute of estimate as true, then change \
-		# todo: the false to true (or jus the st column to true) and run a function which gets the df.loc[col_select] and estimate the missing values by interpolation then returns it
-		# todo:
-
-
-		# check all psse_buses_dict are not null
-		col_select = psse_buses_check_dict.keys()
-		col_name = 'psse_buses' + '_pass'
-		check_cols.append(col_name)
-		df.loc[:, col_name] = True
-		df.loc[df[df[col_select].isnull().all(1)].index, col_name] = False #not sure if this looks at the bus names only or also their percentage values (its probably just the names)
-
-		# final check
-		col_select = check_cols
-		col_name = 'Station_data_pass'
-		df.loc[:, col_name] = False
-		df.loc[df[df[col_select].all(1)].index, col_name] = True
-
-		# final est check
-		# col_select = check_est_cols
-		# col_name = 'Station_data_est'
-		# df.loc[:, col_name] = False
-		# df.loc[df[df[col_select].all(1)].index, col_name] = True
-
-		# output
-		good_data = df['Station_data_pass'].item()
-		#amend_data=df['Station_data_est'].item() # what does .item() do? is good_data a dataf frame?
-		# todo: what does the line above do exactly? what is the good data form?
-		# return good_data,amend_data
-		return good_data
-
-	def station_check(self):
+	def add_sub_station(self, station_obj):
 		"""
-		Function to return a row dataframe for a station object with new columns to check:
-		- MW Peak is a number greater than zero
-		- Each years load forecast is not null or negative
-		- Each seasonal percentage is not null, negative or greater than 100%
-		- That at least one PSSE bus exists for the load
-		A final check column is added to check all above checks have been met
-		:return pd.Dataframe: row dataframe of station object
+		Function to add a stations as a substation to a station object
+		:param station_obj: station object to be added a sub station
+		:return:
 		"""
+		# gsp col, power factor and name of upstream station are taken from this station
+		station_obj.parent = self
+		self.table.parent[station_obj.idx] = self.idx
 
-		# create check dict to have just bus numbers not percentages
-		# todo (percentage values are checked when applying load scaling)
-		psse_buses_check_dict = dict()
-		for key, sub_dict in self.psse_buses_dict.iteritems():
-			psse_buses_check_dict[key] = sub_dict['bus_no']
-
-		# concatenate relevant station properties
-		df = pd.concat([
-			pd.DataFrame([self.gsp_col]),
-			pd.DataFrame([self.nrn]),
-			pd.DataFrame([self.name]),
-			pd.DataFrame([self.peak_mw_dict]),
-			pd.DataFrame([self.pf]),
-			pd.DataFrame([self.load_forecast_dict]),
-			pd.DataFrame([self.seasonal_percent_dict]),
-			pd.DataFrame([psse_buses_check_dict])],
-			axis=1,
-		)
-
-		# initialise a list to store the new check columns names
-		check_cols = list()
-		#estimate_cols = list()
-
-		# check that MW Peak is a number greater than zero
-		col_select = self.peak_mw_dict.keys()
-		col_name = 'peak_mw' + '_pass'
-		check_cols.append(col_name)
-		df.loc[:, col_name] = True
-		df.loc[df[df[col_select].le(0).any(1)].index, col_name] = False
-		df.loc[df[df[col_select].isnull().any(1)].index, col_name] = False
-
-
-		# col_est_name = 'peak_mw' + '_est'
-		# etimate_check_cols.append(col_est_name)
-		# df.loc[:, col_est_name] = False
-		# todo: change the false for MW check back to true if it's a GSP as the MW of the GSP does not matter for the SSE load setting and ew amend class in constant file is having its attribute of estimate as true
-		# if self.st_type == constants.XlFileConstants.gsp_type and constants.amend.estimate==True:
-		# 	df.loc[:, col_name] = True
-		# 	df.loc[:, col_est_name] = True
-
-
-		# check load_forecast_dict is not null or negative
-		col_select = self.load_forecast_dict.keys()
-		col_name = 'load_forecast' + '_pass'
-		check_cols.append(col_name)
-		df.loc[:, col_name] = True
-		df.loc[df[df[col_select].le(0).any(1)].index, col_name] = False
-		df.loc[df[df[col_select].isnull().any(1)].index, col_name] = False
-
-		# col_est_name = 'load_forecast' + '_est'
-		# etimate_check_cols.append(col_est_name)
-		# df.loc[:, col_est_name] = False
-		# todo: if a new amend class in constant file is having its attribute of estimate as true, then change \
-		# todo: the check from false to true (or just the est column to true) and run a function which gets the df.loc[:,col_select] and estimate the missing values by interpolation then returns it
-		# todo: and then the self.load_forecast_dict needs to be updated with the new values from the output dataframe .
-
-		# check seasonal_percent is not null, negative or greater than 1
-		col_select = self.seasonal_percent_dict.keys()
-		col_name = 'seasonal_percent' + '_pass'
-		# col_est_name = 'seasonal_forecast' + '_est'
-		check_cols.append(col_name)
-		df.loc[:, col_name] = True
-		df.loc[df[df[col_select].le(0).any(1)].index, col_name] = False
-		df.loc[df[df[col_select].gt(1).any(1)].index, col_name] = False
-		df.loc[df[df[col_select].isnull().any(1)].index, col_name] = False
-
-
-		# col_est_name = 'seasonal_percent' + '_est'
-		# etimate_check_cols.append(col_est_name)
-		# df.loc[:, col_est_name] = False
-		#if constants.amend.estimate==True and df.loc[0,col_name]==False:
-		# todo:
-
-
-
-
-
-		# check all psse_buses_dict are not null
-		col_select = psse_buses_check_dict.keys()
-		col_name = 'psse_buses' + '_pass'
-		check_cols.append(col_name)
-		df.loc[:, col_name] = True
-		df.loc[df[df[col_select].isnull().all(1)].index, col_name] = False
-
-		# final check
-		col_select = check_cols
-		col_name = 'Station_data_pass'
-		df.loc[:, col_name] = False
-		df.loc[df[df[col_select].all(1)].index, col_name] = True
+		# add the station object to the substation dictionary
+		self.sub_stations_dict.update({len(self.sub_stations_dict.keys()): station_obj})
 
-		# output
-		good_data = df['Station_data_pass'].item()
+		return
 
-		# populate good and bad dataframes
-		if good_data:
-			constants.XlFileConstants.good_data = constants.XlFileConstants.good_data.append(df)
-		else:
-			constants.XlFileConstants.bad_data = constants.XlFileConstants.bad_data.append(df)
+	def calc_load_percentages(self):
+		"""
+		Function to calculate the load forecast of the station as the total of its substations and the percentage of
+		this load each substation has
+		:return:
+		"""
+		self.table.calc_load_percentages([self.idx])
 
-		return good_data
+		return None
 
 
 def sse_load_xl_to_df(xl_filename, xl_ws_name, headers=True):
@@ -416,94 +357,181 @@ def extract_gsp_dfs(raw_df):
 	:param pd.Dataframe() raw_df:
 	:return dict(): network_df_dict Dictionary of dataframes with BSP name as key
 	"""
-	# extract the GSP row index to a list
-	gsp_row_list = list(raw_df[raw_df.iloc[:, constants.XlFileConstants.gsp_col_no].str.contains(constants.XlFileConstants.gsp_type) == True].index)
-	# add the last row index of df so last GSP is captured later on
-	gsp_row_list.append(len(raw_df.index) + constants.XlFileConstants.row_separation)
-
-	# extract the headers from the 1st GSP row and format
-	headers = raw_df.iloc[gsp_row_list[0]].to_list()
-	headers = map(lambda s: s.encode('ascii', 'replace'), headers)#replace the weird charachters by ?
-	headers = map(lambda s: s.strip(), headers) # removes white space before and after the string
-	headers = map(lambda s: s.replace('\n', ''), headers) # remove new line
-
-	# set df columns
-	raw_df.columns = headers
+	# label every row with its GSP in one pass and then split by label
+	net_df = segmentation.stack_gsps(raw_df)
 
 	net_df_dict = collections.OrderedDict()  #a a dictionary which iterates over the items while keeoing the sequence they were entered in
-	# extract each BSP as a dataframe
-	for i in xrange(0, len(gsp_row_list)-1):
+	for name, temp_df in net_df.groupby(level=constants.XlFileConstants.gsp_name_label, sort=False):
+		net_df_dict[name] = temp_df.reset_index(drop=True)
 
-		# extract BSP name
-		name_row = gsp_row_list[i] + 1
-		temp_name = raw_df.iloc[name_row, constants.XlFileConstants.gsp_col_no]
-		# print temp_name
+	return net_df_dict
 
-		# extract the rows of the df dataframe and reset index
-		temp_df = raw_df.iloc[name_row:gsp_row_list[i+1] - constants.XlFileConstants.row_separation].copy()
-		temp_df.reset_index(drop=True, inplace=True)
 
-		# add temp_df to dictionary
-		net_df_dict[temp_name] = temp_df
+def station_table(net_df):
+	"""
+	Function to extract one row for every GSP and primary station so that they can all be checked at once, each row
+	contains the values the station object would be created with
+	:param pd.Dataframe() net_df: rows of every GSP labelled by segmentation.stack_gsps()
+	:return pd.Dataframe(): station table indexed by (GSP name, station type, row in GSP dataframe) with the columns
+	grouped by the check they are used for
+	"""
+	c = constants.XlFileConstants
+
+	gsp_key = net_df.index.get_level_values(c.gsp_name_label)
+	block = net_df.index.get_level_values(c.block_label)
+	row = net_df.index.get_level_values(c.row_label)
+	headers = net_df.columns
+
+	# GSP row is the one with the GSP name, each primary is the first row of its block
+	is_gsp = net_df[c.gsp_type].values == gsp_key.values
+	is_primary = ~is_gsp & (block > 0) & (row == c.bsp_no_rows + (block - 1) * c.prim_no_rows)
+	select = is_gsp | is_primary
+
+	# GSP power factor is below the GSP row, primaries have the default power factor of 1
+	pf = net_df.iloc[:, c.pf_cell_tuple[1]].groupby(level=0, sort=False).shift(-c.pf_cell_tuple[0])
+	pf = pd.to_numeric(pf.where(is_gsp), errors='coerce').fillna(1)
+
+	# percentage of the load at each PSSE bus is below the bus number
+	bus_headers = sorted(headers[c.psse_buses_col_range])
+	pc_df = net_df[bus_headers].groupby(level=0, sort=False).shift(-1)
+
+	df = net_df.loc[select]
+	seasonal_df = df[list(headers[c.seasonal_percent_col_range])].copy()
+	seasonal_df[c.max_demand_str] = 1  # 1 means 100%
+
+	table = pd.concat([
+		df[list(headers[[c.gsp_col_no, c.nrn_col_no, c.name_col_no]])],
+		df[[headers[c.peak_mw_col]]],
+		pf[select].to_frame(name=c.pf_str),
+		df[sorted(headers[c.load_forecast_col_range])],
+		seasonal_df[sorted(seasonal_df.columns)],
+		df[bus_headers],
+		pc_df.loc[select]],
+		axis=1,
+		keys=[c.station_group, c.peak_mw_check, c.pf_group, c.load_forecast_check, c.seasonal_percent_check,
+			c.psse_buses_check, c.psse_pc_group]
+	)
+	table.index = pd.MultiIndex.from_arrays(
+		[gsp_key[select], np.where(is_gsp[select], c.gsp_type, c.primary_type), row[select]],
+		names=c.station_table_index)
 
-	return net_df_dict
+	return table.infer_objects()
 
 
-def create_stations(df_dict):
+def validate_stations(table):
+	"""
+	Function to carry out the checks on every station in the station table at once:
+	- MW Peak is a number greater than zero
+	- Each years load forecast is not null or negative
+	- Each seasonal percentage is not null, negative or greater than 100%
+	- That at least one PSSE bus exists for the load (percentage values are checked when applying load scaling)
+	The primaries of a GSP that fails its checks are not checked and so are in neither the good or bad data
+	:param pd.Dataframe() table: station table from station_table()
+	:return (pd.Dataframe(), pd.Dataframe(), pd.Dataframe()): good_data, bad_data and failures, good_data and
+	bad_data have a pass column for each check and a final check column, failures has a column for each check which
+	is True where the station fails it
+	"""
+	c = constants.XlFileConstants
+
+	peak_mw = table[c.peak_mw_check]
+	load_forecast = table[c.load_forecast_check]
+	seasonal_percent = table[c.seasonal_percent_check]
+	failures = pd.DataFrame(collections.OrderedDict([
+		(c.peak_mw_check, peak_mw.le(0).any(axis=1) | peak_mw.isnull().any(axis=1)),
+		(c.load_forecast_check, load_forecast.le(0).any(axis=1) | load_forecast.isnull().any(axis=1)),
+		(c.seasonal_percent_check, (
+			seasonal_percent.le(0).any(axis=1) | seasonal_percent.gt(1).any(axis=1) |
+			seasonal_percent.isnull().any(axis=1))),
+		(c.psse_buses_check, table[c.psse_buses_check].isnull().all(axis=1))
+	]))
+	station_pass = ~failures.any(axis=1)
+
+	# only include primaries in the good and bad data if their GSP passes its checks
+	gsp_key = table.index.get_level_values(c.station_table_index[0])
+	is_gsp = table.index.get_level_values(c.station_table_index[1]) == c.gsp_type
+	gsp_pass = pd.Series(station_pass.values[is_gsp], index=gsp_key[is_gsp])
+	checked = is_gsp | gsp_pass.reindex(gsp_key).fillna(False).values.astype(bool)
+
+	# checks are reported alongside the station values
+	df = table.drop(columns=c.psse_pc_group, level=0)
+	df.columns = df.columns.droplevel(0)
+	for check in failures.columns:
+		df[check + c.pass_suffix] = ~failures[check]
+	df[c.station_pass] = station_pass
+
+	good_data = df.loc[checked & station_pass.values].reset_index(drop=True)
+	bad_data = df.loc[checked & ~station_pass.values].reset_index(drop=True)
+
+	return good_data, bad_data, failures
+
+
+def create_stations(net_df, results):
 	"""
-	Function to create station objects from dataframe
-	:param dict() df_dict: Dictionary of dataframes
+	Function to create station objects from dataframe, the station values are stored in a single StationTable shared
+	by all of the station objects
+	:param pd.Dataframe() net_df: rows of every GSP labelled by segmentation.stack_gsps()
+	:param validation.ValidationResults results: results of the checks for this import
 	:return dict(): Dictionary of station objects
 	"""
-	st_dict = collections.OrderedDict()
+	c = constants.XlFileConstants
 
-	for name, net in df_dict.iteritems():
-		# todo why is the
-		logger.info('Processing: ' + name)
-		# print('Processing: ' + name)
-
-		# extract GSP rows as individual dataframe
-		gsp_idx = net[net[constants.XlFileConstants.gsp_type] == name].index.item()
-		gsp_df = net.iloc[gsp_idx:gsp_idx + constants.XlFileConstants.bsp_no_rows]
-
-		# create station object
-		gsp_station = Station(gsp_df, constants.XlFileConstants.gsp_type)
-
-		# check gsp_station row
-		# only add GSP if passes row check
-		if gsp_station.station_check():  #here another station check can be done to add substations even if it does not pass with the suggested values.
-
-			# create new dataframe without the bsp rows
-			# todo bit hard coded
-			prim_temp_df = net.loc[net.index[4:]]
-			#test=net.iloc[4:]
-			# step through prim_temp_df in 3 rows at a time
-			for b in xrange(0, len(prim_temp_df.index), constants.XlFileConstants.prim_no_rows):
-				prim_df = prim_temp_df.iloc[b: b + constants.XlFileConstants.prim_no_rows]
-				prim_station = Station(prim_df, constants.XlFileConstants.primary_type)
-				# if primary passes station check add to GSP
-				if prim_station.station_check():
-					gsp_station.add_sub_station(prim_station)
-				# if primary passes gsp scalable check add to GSP
-				elif prim_station.scalable_indv_check():
-					gsp_station.add_sub_station(prim_station)
-					prim_station.idv_scalable = False
-				# else do not add the primary station to the gsp
-				else:
-					gsp_station.gsp_scalable = False
-					del prim_station
+	# check every station at once
+	table = station_table(net_df)
+	good_data, bad_data, failures = validate_stations(table)
+	results.set_data(good_data, bad_data)
+
+	# stations which pass every check and those which pass all but the seasonal percentage check
+	station_pass = ~failures.any(axis=1).values
+	indv_pass = ~failures.drop(columns=c.seasonal_percent_check).any(axis=1).values
+
+	# only add GSPs which pass the checks, primaries are added to their GSP if they pass either check
+	gsp_key = table.index.get_level_values(c.station_table_index[0])
+	is_gsp = table.index.get_level_values(c.station_table_index[1]) == c.gsp_type
+	gsp_pass = pd.Series(station_pass[is_gsp], index=gsp_key[is_gsp])
+	in_gsp = gsp_pass.reindex(gsp_key).fillna(False).values.astype(bool)
+	keep = (is_gsp & station_pass) | (~is_gsp & in_gsp & indv_pass)
+
+	# a GSP is not scalable if any of its primaries are not added
+	not_added = pd.Series(~is_gsp & in_gsp & ~indv_pass, index=gsp_key).groupby(level=0, sort=False).any()
+
+	# each primary is a substation of the GSP row with the same GSP name
+	is_gsp = is_gsp[keep]
+	gsp_key = gsp_key[keep]
+	gsp_rows = pd.Series(np.flatnonzero(is_gsp), index=gsp_key[is_gsp])
+	parent = np.where(is_gsp, -1, gsp_rows.reindex(gsp_key).fillna(-1).values).astype(int)
+
+	stations = StationTable(table.loc[keep], parent=parent)
+	stations.idv_scalable[:] = station_pass[keep]
+	stations.gsp_scalable[is_gsp] = ~not_added.reindex(gsp_key[is_gsp]).values.astype(bool)
+
+	# todo why is the
+	with log_handlers.MessageSummary(logger=logger, summary='Processing: {} GSPs') as summary:
+		for name in gsp_key[is_gsp]:
+			summary.add(name, 'Processing: {}', name)
+
+	# If the GSP is scalable ie all primaries pass checks - calculate forecast loads for every scalable GSP at once
+	stations.calc_load_percentages(np.flatnonzero(is_gsp & stations.gsp_scalable))
+
+	return build_station_dict(stations)
 
-			if gsp_station.gsp_scalable:
-				# If the GSP is scalable ie all primaries pass checks - calculate forecast loads
-				gsp_station.calc_load_percentages()
 
-			# finally add station to station dictionary
-			st_dict.update({len(st_dict.keys()): gsp_station})
-		else:
-			del gsp_station
+def build_station_dict(stations):
+	"""
+	Function to create the station objects for a station table, each station without an upstream station is added to
+	the dictionary with its substations
+	:param StationTable stations: table of station values
+	:return dict(): Dictionary of station objects
+	"""
+	st_dict = collections.OrderedDict()
+
+	for idx in np.flatnonzero(stations.parent < 0):
+		# create station object and add its substations
+		station = Station(stations, idx)
+		for sub_idx in stations.children(idx):
+			station.add_sub_station(Station(stations, sub_idx))
 
-	# for num, gsp in st_dict.iteritems():
-	# 	print (gsp.gsp_col.values())
+		# finally add station to station dictionary
+		st_dict.update({len(st_dict.keys()): station})
 
 	return st_dict
 
@@ -548,52 +576,65 @@ def scale_all_loads(year=str(), season=str()):
 	# psse_con.load_data_case(pth_sav=psse_case)
 	# psse_con.change_output(destination=False)
 
-	loads = psse.LoadData()
-	loads_df = loads.df.set_index('NUMBER')
-	loads_list = map(int, list(loads_df.index))
-
-	for station_no, station in constants.General.station_dict.iteritems():
-
-		# for num, psse_bus in station.psse_buses_dict.iteritems():
-
-			# p = station.load_forecast_dict[year] * station.seasonal_percent_dict[season] * station.pf['p.f']
-			# q = p * math.tan(math.acos(station.pf['p.f']))
-			#
-			# # if there is load at the station bus
-			# if psse_bus in loads_list:
-			# 	ierr = psspy.load_chng_5(
-			# 		ibus=psse_bus,
-			# 		id=loads_df.loc[psse_bus, 'ID'],
-			# 		realar1=p,  # P load MW
-			# 		realar2=q)  # Q load MW
-
-		for i in xrange(0, station.no_sub_stations):
-
-			sub_station = station.sub_stations_dict[i]
-
-			if sub_station.idv_scalable:
-
-				for sub_num, sub_psse_bus in sub_station.psse_buses_dict.iteritems():
-
-					if math.isnan(sub_psse_bus['bus_no']):
-						continue
-					if sub_psse_bus['bus_no'] in loads_list:
-						p = sub_station.load_forecast_dict[year] * \
-							sub_station.seasonal_percent_dict[season] * \
-							sub_station.pf['p.f'] * \
-							sub_psse_bus['pc']
-
-						q = p * math.tan(math.acos(sub_station.pf['p.f']))
-						# loads at the substations buses
+	station_dict = get_station_dict()
+	if not station_dict:
+		return None
 
-						ierr = psspy.load_chng_5(
-							i=sub_psse_bus['bus_no'],
-							id=loads_df.loc[sub_psse_bus['bus_no'], 'ID'],
-							realar1=p,  # P load MW
-							realar2=q)  # Q load MW
-						break
-					else:
-						logger.info('Bus number ' + str(sub_psse_bus) + ' not in PSSE sav case')
+	c = constants.Loads
+	loads = psse.LoadData()
+	# first load at each busbar indexed by busbar number so that all busbars can be looked up at once
+	loads_df = loads.df.drop_duplicates(subset=c.bus).set_index(c.bus)
+	loads_df.index = loads_df.index.astype(int)
+
+	# all stations share the same table, the primaries of each GSP which are individually scalable are scaled
+	table = station_dict.values()[0].table
+	gsp_rows = [station.idx for station in station_dict.itervalues()]
+	rows = np.flatnonzero(np.in1d(table.parent, gsp_rows) & table.idv_scalable)
+
+	# load of each primary which is then split between its buses, power factor is taken from the GSP
+	pf = table.pf[table.parent[rows]]
+	p_station = \
+		table.load_forecast[rows, table.years.index(year)] * \
+		table.seasonal_percent[rows, table.seasons.index(season)] * \
+		pf
+
+	# position of the load at each busbar of each primary, -1 if there is no busbar or it is not in the case
+	bus_no = table.bus_no[rows]
+	bus_pc = table.bus_pc[rows]
+	valid = ~np.isnan(bus_no)
+	load_pos = np.full(bus_no.shape, -1, dtype=int)
+	load_pos[valid] = loads_df.index.get_indexer(bus_no[valid].astype(int))
+	found = load_pos >= 0
+
+	# only the first busbar of each primary with a load in the case is scaled, busbars before it are reported
+	scaled = np.flatnonzero(found.any(axis=1))
+	first = found.argmax(axis=1)
+	first[~found.any(axis=1)] = bus_no.shape[1]
+	checked = np.arange(bus_no.shape[1]) < first[:, np.newaxis]
+	with log_handlers.MessageSummary(logger=logger, summary='{} bus numbers not in PSSE sav case') as summary:
+		for bus in bus_no[valid & ~found & checked]:
+			summary.add(int(bus), 'Bus number {} not in PSSE sav case', int(bus))
+
+	col = first[scaled]
+	p = p_station[scaled] * bus_pc[scaled, col]
+	with np.errstate(invalid='ignore'):
+		q = p * np.tan(np.arccos(pf[scaled]))
+	load_pos = load_pos[scaled, col]
+
+	# loads which already have these values are left as they are
+	current = loads_df[c.load_nominal].values[load_pos].astype(complex)
+	changed = ~(np.isclose(current.real, p) & np.isclose(current.imag, q))
+	logger.debug('{} of {} loads changed'.format(np.count_nonzero(changed), len(changed)))
+
+	for bus, load_id, p_bus, q_bus in zip(
+			loads_df.index.values[load_pos[changed]], loads_df[c.identifier].values[load_pos[changed]],
+			p[changed], q[changed]):
+		# loads at the substations buses
+		ierr = psspy.load_chng_5(
+			i=int(bus),
+			id=load_id,
+			realar1=p_bus,  # P load MW
+			realar2=q_bus)  # Q load MW
 
 	return None
 
@@ -642,6 +683,28 @@ def set_growth_const(df):
 	return None
 
 
+def exp_checks_to_excel(file_path, good_data, bad_data):
+	"""
+	Function to write the good data and bad data to separate sheets of an excel file
+	:param str file_path: Full path of the excel file to create
+	:param pd.DataFrame good_data: Rows that passed the data checks
+	:param pd.DataFrame bad_data: Rows that failed the data checks
+	:return:
+	"""
+	with pd.ExcelWriter(file_path) as writer:
+		good_data.to_excel(writer, sheet_name=constants.XlFileConstants.sheet1) # is good and bad data empty dataframes at this stage?
+		bad_data.to_excel(writer, sheet_name=constants.XlFileConstants.sheet2)
+		#constants.XlFileConstants.amend_data.to_excel(writer, sheet_name=constants.XlFileConstants.sheet3)
+		worksheet1 = writer.sheets[constants.XlFileConstants.sheet1]
+		worksheet1.set_tab_color('green')
+		worksheet1 = writer.sheets[constants.XlFileConstants.sheet2]
+		worksheet1.set_tab_color('red')
+		#worksheet1 = writer.sheets[constants.XlFileConstants.sheet3]
+		# worksheet1.set_tab_color('yellow')
+
+	return None
+
+
 def process_load_estimates_xl(xl_path):
 	"""
 	Function to load SSE load estimates excel file, perform data checks and create dictionary of station objects
@@ -652,11 +715,14 @@ def process_load_estimates_xl(xl_path):
 	# load worksheet into dataframe
 	raw_dataframe = sse_load_xl_to_df(xl_path, constants.XlFileConstants.excel_ws_name)
 
-	# extract individual GSPs
-	network_df_dict = extract_gsp_dfs(raw_dataframe)
+	# label the rows of every GSP rather than extracting each one
+	net_df = segmentation.stack_gsps(raw_dataframe)
+
+	# results of any previous import are released before the checks are carried out
+	results = validation.new_run()
 
 	# create station dictionary
-	station_dict = create_stations(network_df_dict)
+	station_dict = create_stations(net_df, results)
 
 
 	# Check params folder exists to store log files in and if not create appropriate folders
@@ -670,19 +736,13 @@ def process_load_estimates_xl(xl_path):
 		constants.XlFileConstants.params_folder,
 		constants.XlFileConstants.xl_checks_file_name
 	)
-	with pd.ExcelWriter(file_path) as writer:
-		constants.XlFileConstants.good_data.to_excel(writer, sheet_name=constants.XlFileConstants.sheet1) # is good and bad data empty dataframes at this stage?
-		constants.XlFileConstants.bad_data.to_excel(writer, sheet_name=constants.XlFileConstants.sheet2)
-		#constants.XlFileConstants.amend_data.to_excel(writer, sheet_name=constants.XlFileConstants.sheet3)
-		worksheet1 = writer.sheets[constants.XlFileConstants.sheet1]
-		worksheet1.set_tab_color('green')
-		worksheet1 = writer.sheets[constants.XlFileConstants.sheet2]
-		worksheet1.set_tab_color('red')
-		#worksheet1 = writer.sheets[constants.XlFileConstants.sheet3]
-		# worksheet1.set_tab_color('yellow')
+	# Workbook is written in the background whilst the params are created
+	export_service.exporter.submit(
+		file_path, exp_checks_to_excel, file_path=file_path,
+		good_data=results.good_data, bad_data=results.bad_data)
 
 	# Create a dictionary to save the params after reading in excel file
-	params_dict = create_params_pkl(station_dict, xl_path)
+	params_dict = save_params(station_dict, xl_path, results)
 	# params_dict[constants.SavedParamsStrings.station_dict_str] = station_dict
 	# params_dict[constants.SavedParamsStrings.xl_file_name] = os.path.basename(xl_path)
 	# params_dict[constants.SavedParamsStrings.loads_complete_str] = constants.XlFileConstants.bad_data.empty
@@ -712,17 +772,28 @@ def process_load_estimates_xl(xl_path):
 	set_params_constants(params_dict)
 
 
-def create_params_pkl(station_dict, xl_path):
+def params_path(file_name):
+	"""
+	Function to return the full path of a file in the params folder
+	:param str file_name: name of the file
+	:return str:
+	"""
+	return os.path.join(constants.General.cur_path, constants.XlFileConstants.params_folder, file_name)
+
+
+def save_params(station_dict, xl_path, results):
 	"""
-	Function to create params dict and save it to a pkl/dill file
+	Function to create params dict and save it to the params store, the station data is saved to a numpy .npz file and
+	everything else to a small JSON header which is all that is needed when the GUI starts
 	:param station_dict: dictionary of station objects
 	:param xl_path: path of the SSE load estimates excel file
+	:param validation.ValidationResults results: results of the checks for this import
 	:return: params_dict
 	"""
 	params_dict = dict()
-	params_dict[constants.SavedParamsStrings.station_dict_str] = station_dict
+	params_dict[constants.SavedParamsStrings.version_str] = constants.SavedParamsStrings.params_version
 	params_dict[constants.SavedParamsStrings.xl_file_name] = os.path.basename(xl_path)
-	params_dict[constants.SavedParamsStrings.loads_complete_str] = constants.XlFileConstants.bad_data.empty # this is to check whether all data are available (as in all checks passes)
+	params_dict[constants.SavedParamsStrings.loads_complete_str] = results.complete # this is to check whether all data are available (as in all checks passes)
 
 	# use the keys from the first station object for years list and demand scaling list
 	params_dict[constants.SavedParamsStrings.years_list_str] = \
@@ -737,17 +808,60 @@ def create_params_pkl(station_dict, xl_path):
 			temp_list.append(gsp.gsp)
 	params_dict[constants.SavedParamsStrings.scalable_GSP_list_str] = sorted(temp_list)
 
-	# save a pickle/dill file of the params dict to speed up processing later
-	with open(os.path.join(
-			constants.General.cur_path,
-			constants.XlFileConstants.params_folder,
-			constants.SavedParamsStrings.params_file_name),
-			'wb') as f:
-		dill.dump(params_dict, f)
+	# station data is saved first so the header is only written once there is data for it to refer to
+	params_dict[constants.SavedParamsStrings.station_data_str] = constants.SavedParamsStrings.params_data_name
+	station_dict[0].table.save(params_path(constants.SavedParamsStrings.params_data_name))
+	with open(params_path(constants.SavedParamsStrings.params_header_name), 'w') as f:
+		json.dump(params_dict, f, indent=2)
+
+	# stations are already available so do not need to be loaded again
+	params_dict[constants.SavedParamsStrings.station_dict_str] = station_dict
 
 	return params_dict
 
 
+def load_params():
+	"""
+	Function to load the header of the params store, the station data is only loaded when get_station_dict() is
+	first called
+	:return: params_dict or None if there is no params store or it was saved by a different version
+	"""
+	header_path = params_path(constants.SavedParamsStrings.params_header_name)
+	if not os.path.exists(header_path):
+		return None
+
+	with open(header_path, 'r') as f:
+		params_dict = json.load(f)
+
+	if params_dict.get(constants.SavedParamsStrings.version_str) != constants.SavedParamsStrings.params_version:
+		logger.warning(
+			'Saved params in {} are from a different version and have not been loaded, the SSE load estimates '
+			'need to be imported again'.format(header_path))
+		return None
+
+	params_dict[constants.SavedParamsStrings.station_dict_str] = None
+
+	return params_dict
+
+
+def get_station_dict():
+	"""
+	Function to return the dictionary of station objects, if the params were loaded from the params store then the
+	station data is loaded the first time this is called
+	:return dict(): Dictionary of station objects
+	"""
+	if not constants.General.station_dict and constants.General.params_dict.get(
+			constants.SavedParamsStrings.station_data_str):
+		t0 = time.time()
+		stations = StationTable.load(
+			params_path(constants.General.params_dict[constants.SavedParamsStrings.station_data_str]))
+		constants.General.station_dict = build_station_dict(stations)
+		constants.General.params_dict[constants.SavedParamsStrings.station_dict_str] = constants.General.station_dict
+		logger.debug('Station data loaded in {:.3f} seconds'.format(time.time() - t0))
+
+	return constants.General.station_dict
+
+
 def set_params_constants(params_dict):
 	"""
 	FUunction to set the General constatns from a params dictionary
@@ -770,8 +884,9 @@ def set_params_constants(params_dict):
 		constants.General.params_dict[constants.SavedParamsStrings.years_list_str]
 	constants.General.demand_scaling_list = \
 		constants.General.params_dict[constants.SavedParamsStrings.demand_scaling_list_str]
+	# station data is not loaded until it is needed if the params have come from the params store
 	constants.General.station_dict = \
-		constants.General.params_dict[constants.SavedParamsStrings.station_dict_str]
+		constants.General.params_dict[constants.SavedParamsStrings.station_dict_str] or dict()
 	constants.General.loads_complete = \
 		constants.General.params_dict[constants.SavedParamsStrings.loads_complete_str]
 	constants.General.xl_file_name = \
@@ -805,18 +920,11 @@ if __name__ == '__main__':
 
 	constants.General.cur_path = os.path.dirname(__file__)
 
-	# if there is a params file load this and set constants
-	params_file = os.path.join(
-		constants.General.cur_path,
-		constants.XlFileConstants.params_folder,
-		constants.SavedParamsStrings.params_file_name
-	)
-	if os.path.exists(params_file):
-		with open(params_file, 'rb') as f:
-			constants.General.params_dict = dill.load(f)
-
+	# if there are saved params load the header and set constants, the station data is loaded when first needed
+	params_dict = load_params()
+	if params_dict is not None:
 		# update constants from params_dict
-		set_params_constants(constants.General.params_dict)
+		set_params_constants(params_dict)
 
 	# todo this is probably no needed when running form PSSE
 	# init_psse = psse.InitialisePsspy()
@@ -10,6 +10,8 @@ import load_est.psse as psse
 # psse = reload(psse)
 import load_est.constants as constants
 import load_est.common_functions as common_functions
+import load_est.validation as validation
+import load_est.log_handlers as log_handlers
 # constants = reload(constants)
 import logging
 import collections
@@ -260,7 +262,7 @@ class Station:
 		# return good_data,amend_data
 		return good_data
 
-	def station_check(self):
+	def station_check(self, results):
 		"""
 		Function to return a row dataframe for a station object with new columns to check:
 		- MW Peak is a number greater than zero
@@ -268,6 +270,7 @@ class Station:
 		- Each seasonal percentage is not null, negative or greater than 100%
 		- That at least one PSSE bus exists for the load
 		A final check column is added to check all above checks have been met
+		:param validation.ValidationResults results: results of the checks for this import which the row is added to
 		:return pd.Dataframe: row dataframe of station object
 		"""
 
@@ -365,10 +368,7 @@ class Station:
 		good_data = df['Station_data_pass'].item()
 
 		# populate good and bad dataframes
-		if good_data:
-			constants.XlFileConstants.good_data = constants.XlFileConstants.good_data.append(df)
-		else:
-			constants.XlFileConstants.bad_data = constants.XlFileConstants.bad_data.append(df)
+		results.add(df, good_data)
 
 		return good_data
 
@@ -457,10 +457,13 @@ def create_stations(df_dict):
 	:return dict(): Dictionary of station objects
 	"""
 	st_dict = collections.OrderedDict()
+	# results of any previous import are released before the checks are carried out
+	results = validation.new_run()
+	summary = log_handlers.MessageSummary(logger=logger, summary='Processing: {} GSPs')
 
 	for name, net in df_dict.iteritems():
 		# todo why is the
-		logger.info('Processing: ' + name)
+		summary.add(name, 'Processing: {}', name)
 		# print('Processing: ' + name)
 
 		# extract GSP rows as individual dataframe
@@ -472,7 +475,7 @@ def create_stations(df_dict):
 
 		# check gsp_station row
 		# only add GSP if passes row check
-		if gsp_station.station_check():  #here another station check can be done to add substations even if it does not pass with the suggested values.
+		if gsp_station.station_check(results):  #here another station check can be done to add substations even if it does not pass with the suggested values.
 
 			# create new dataframe without the bsp rows
 			# todo bit hard coded
@@ -483,7 +486,7 @@ def create_stations(df_dict):
 				prim_df = prim_temp_df.iloc[b: b + constants.XlFileConstants.prim_no_rows]
 				prim_station = Station(prim_df, constants.XlFileConstants.primary_type)
 				# if primary passes station check add to GSP
-				if prim_station.station_check():
+				if prim_station.station_check(results):
 					gsp_station.add_sub_station(prim_station)
 				# if primary passes gsp scalable check add to GSP
 				elif prim_station.scalable_indv_check():
@@ -503,6 +506,8 @@ def create_stations(df_dict):
 		else:
 			del gsp_station
 
+	summary.log()
+
 	# for num, gsp in st_dict.iteritems():
 	# 	print (gsp.gsp_col.values())
 
@@ -557,50 +562,80 @@ def scale_all_loads(df_load_values, year=str(), season=str(), diverse=False, zon
 	# psse_con.load_data_case(pth_sav=psse_case)
 	# psse_con.change_output(destination=False)
 
+	c = constants.Loads
+	h = common_functions.Headers
+
+	# only primary substations are scaled since PSSE loads are not modelled explicitly for GSPs, if GSPs have been
+	# provided then only the primaries of those GSPs
+	df = df_load_values
+	select = (df[h.sub_primary] == 1).values
+	if len(gsp) > 0:
+		select &= df[h.gsp].isin(list(gsp)).values
+	df = df.loc[select]
+
+	# diverse values are in the year columns and aggregate values in the columns starting with agg
+	if diverse:
+		year_column = year
+	else:
+		year_column = filter(lambda local_x: local_x.startswith('agg') and year in local_x, df.columns)[0]
+
+	# every busbar of every substation flattened into arrays
+	bus_list = filter(lambda local_x: local_x.startswith('PS'), df.columns)
+	percent_list = filter(lambda local_x: local_x.startswith('per'), df.columns)
+	bus_no = df[bus_list].values.astype(float)
+	valid = ~np.isnan(bus_no)
+	substation = np.nonzero(valid)[0]
+	bus = bus_no[valid].astype(int)
+	name = df[h.name].values[substation]
+
+	# substation P and Q split between its busbars
+	pf = pd.to_numeric(df[h.PF], errors='coerce').values[substation]
+	p_bus = \
+		pd.to_numeric(df[year_column], errors='coerce').values[substation] * \
+		pd.to_numeric(df[season], errors='coerce').values[substation] * \
+		pf * df[percent_list].values.astype(float)[valid]
+	with np.errstate(invalid='ignore'):
+		q_bus = p_bus * np.tan(np.arccos(pf))
+
+	# busbars in the model, and if zones have been provided then only those in the zones
 	loads = psse.LoadData()
-	loads_df = loads.df.set_index('NUMBER')
-	loads_list = map(int, list(loads_df.index))
-
-	# TODO: @NS - The following code needs to be changed as follows
-	# TODO: @NS... 1. Apply filter to select only Primary substations since not PSSe loads modelled explicitly for GSPs
-	# TODO: @NS... 2. Apply filter to select only GSPs or Zones that have been provided as an input
-	# TODO: @NS... 3. Loop through remaining DataFrame and set load values for the appropriate year (psuedo code below)
-
-	# TODO: @NS - Note, the following is just a suggested example and it maybe worth breaking up into smaller functions
-	for idx, substation in df_filtered.iterrows():
-		# TODO: @NS - Calculate substation P and Q
-		p = substation[year] * substation[season] * substation[pf]
-		q =
-
-		# Loop through each busbar in substation
-		# TODO: @NS - Need some way to be able to loop through all of the busbars associated with a substation
-		for bus in substations[buses]:
-
-			p_bus = p * bus[proportion]
-			q_bus = q * bus[proportion]
-
-			# Confirm busbar exists in model and if so update, otherwise alert user
-			if bus[busbar_number] in loads_list:
-				# Set the load value for this busbar
-				# TODO: @NS - Should make use of the psse.LoadData() class rather than this function, will come back to that
-				ierr = psspy.load_chng_5(
-					i=bus[busbar_number],
-					id=constants.Loads.default_id,
-					realar1=p_bus,  # P load MW
-					realar2=q_bus	# Q load Mvar
-				)
-				logger.debug((
-								 'PSSE busbar {} associated with {} updated with a new P/Q value of {:.2f}/{:.2f}'
-							 ).format(bus[busbar_number], substation[name], p_bus, q_bus)
-							 )
-			else:
-				logger.error((
-								 'PSSE busbar {} associated with {} not found in PSSe model'
-							 ).format(bus[busbar_number], substation[name])
-							 )
-
-			# TODO: @NS - We will also need to disconnect any other loads modelled at this busbar already in the model
-			# TODO: @NS... to ensure the total load numbers are reaonsable
+	loads_df = loads.df.set_index(c.bus)
+	loads_df.index = loads_df.index.astype(int)
+	in_psse = pd.Index(bus).isin(loads_df.index)
+	select = in_psse
+	if len(zone) > 0:
+		select = select & pd.Index(bus).isin(loads_df.index[loads_df[c.zone].isin(list(zone)).values])
+
+	with log_handlers.MessageSummary(
+			logger=logger, summary='{} PSSE busbars not found in PSSe model', level=logging.ERROR) as summary:
+		for bus_not_found, name_not_found in zip(bus[~in_psse], name[~in_psse]):
+			summary.add(
+				bus_not_found, 'PSSE busbar {} associated with {} not found in PSSe model', bus_not_found, name_not_found)
+
+	# loads which already have these values are left as they are
+	default_loads = loads_df[loads_df[c.identifier].astype(str).str.strip() == c.default_id]
+	default_loads = default_loads[~default_loads.index.duplicated()]
+	current = default_loads[c.load_nominal].reindex(bus).values.astype(complex)
+	changed = ~(np.isclose(current.real, p_bus) & np.isclose(current.imag, q_bus))
+	select = select & changed
+	logger.debug('{} of {} PSSE busbars changed'.format(np.count_nonzero(select), np.count_nonzero(in_psse)))
+
+	summary = log_handlers.MessageSummary(logger=logger, summary='{} PSSE busbars updated with new P/Q values')
+	for i, bus_name, p, q in zip(bus[select], name[select], p_bus[select], q_bus[select]):
+		# Set the load value for this busbar
+		# TODO: @NS - Should make use of the psse.LoadData() class rather than this function, will come back to that
+		ierr = psspy.load_chng_5(
+			i=int(i),
+			id=c.default_id,
+			realar1=p,  # P load MW
+			realar2=q	# Q load Mvar
+		)
+		summary.add(
+			i, 'PSSE busbar {} associated with {} updated with a new P/Q value of {:.2f}/{:.2f}', i, bus_name, p, q)
+	summary.log()
+
+	# TODO: @NS - We will also need to disconnect any other loads modelled at this busbar already in the model
+	# TODO: @NS... to ensure the total load numbers are reaonsable
 
 	# for station_no, station in constants.General.station_dict.iteritems():
 	#
@@ -726,7 +761,7 @@ def create_params_pkl(station_dict, xl_path):
 	params_dict = dict()
 	params_dict[constants.SavedParamsStrings.station_dict_str] = station_dict
 	params_dict[constants.SavedParamsStrings.xl_file_name] = os.path.basename(xl_path)
-	params_dict[constants.SavedParamsStrings.loads_complete_str] = constants.XlFileConstants.bad_data.empty # this is to check whether all data are available (as in all checks passes)
+	params_dict[constants.SavedParamsStrings.loads_complete_str] = validation.current.complete # this is to check whether all data are available (as in all checks passes)
 
 	# use the keys from the first station object for years list and demand scaling list
 	params_dict[constants.SavedParamsStrings.years_list_str] = \
@@ -10,6 +10,7 @@ import load_est.psse as psse
 # psse = reload(psse)
 import load_est.constants as constants
 # constants = reload(constants)
+import load_est.segmentation as segmentation
 import logging
 import collections
 import time
@@ -68,47 +69,12 @@ def data_clean(raw_df):
 	:param pd.Dataframe() raw_df:
 	:return dict(): network_df_dict Dictionary of dataframes with BSP name as key
 	"""
-	# extract the GSP row index to a list
-	gsp_row_list = list(raw_df[raw_df.iloc[:, constants.XlFileConstants.gsp_col_no].str.contains(constants.XlFileConstants.gsp_type) == True].index)
-	# add the last row index of df so last GSP is captured later on
-	gsp_row_list.append(len(raw_df.index) + constants.XlFileConstants.row_separation)
-
-	# extract the headers from the 1st GSP row and format
-	headers = raw_df.iloc[gsp_row_list[0]].to_list()
-	headers = map(lambda s: s.encode('ascii', 'replace'), headers)#replace the weird charachters by ?
-	headers = map(lambda s: s.strip(), headers) # removes white space before and after the string
-	headers = map(lambda s: s.replace('\n', ''), headers) # remove new line
-
-	# set df columns
-	raw_df.columns = headers
-
-	net_df_dict = collections.OrderedDict()  #a a dictionary which iterates over the items while keeoing the sequence they were entered in
-	Merged=raw_df.iloc[0:2]
+	# headers are set from the first GSP row
+	segmentation.segment_blocks(raw_df)
+
 	#Merged3=raw_df[(raw_df['NRN'].notnull()) & raw_df['NRN']!='NRN']
 	Merged3 = raw_df[raw_df['NRN'].notnull()]
 	Merged3=Merged3[~Merged3['NRN'].isin(['NRN'])]
-
-
-	# extract each BSP as a dataframe
-	for i in xrange(0, len(gsp_row_list)-1):
-
-		# extract BSP name
-		name_row = gsp_row_list[i] + 1
-		temp_name = raw_df.iloc[name_row, constants.XlFileConstants.gsp_col_no]
-		# print temp_name
-
-		# extract the rows of the df dataframe and reset index
-		temp_df = raw_df.iloc[name_row:gsp_row_list[i+1] - constants.XlFileConstants.row_separation].copy()
-		temp_df.reset_index(drop=True, inplace=True)
-		# add temp_df to dictionary
-		net_df_dict[temp_name] = temp_df
-		# Merged=[Merged,temp_df]
-		# Merged=pd.DataFrame
-		Merged=Merged.append(temp_df)
-
-	Merged=Merged.drop(Merged.index[0:1])
-	# Merged.reset_index
-	Merged1 = Merged[Merged['NRN'].notnull()]
 	#return [net_df_dict,Merged3]
 	return Merged3
 # if __name__ == '__main__':
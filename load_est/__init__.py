@@ -17,6 +17,8 @@ import time
 import inspect
 import subprocess
 import shutil
+import atexit
+import Queue
 
 # Meta Data
 __author__ = 'David Mills'
@@ -130,6 +132,8 @@ except ImportError:
 try:
 	# Try and import G74 packages
 	import load_est.constants as constants
+	import load_est.log_handlers as log_handlers
+	import load_est.psspy_profiler as psspy_profiler
 	import load_est.psse as psse
 	import load_est.file_handling as file_handling
 	import load_est.gui as gui
@@ -204,6 +208,8 @@ except (ImportError, AttributeError):
 		raise EnvironmentError('Unable to install missing python packages')
 
 	import load_est.constants as constants
+	import load_est.log_handlers as log_handlers
+	import load_est.psspy_profiler as psspy_profiler
 	import load_est.psse as psse
 	import load_est.file_handling as file_handling
 	import load_est.gui as gui
@@ -267,6 +273,8 @@ class Logger:
 		self.handler_debug_log = None
 		self.handler_error_log = None
 		self.handler_stream_log = None
+		# Listener which passes the log messages to the handlers on a background thread
+		self.listener = None
 
 		# Counter for each error message that occurs
 		self.warning_count = 0
@@ -275,7 +283,8 @@ class Logger:
 
 		# Populate default paths
 		self.pth_logs = pth_logs
-		self.pth_debug_log = os.path.join(pth_logs, 'DEBUG_{}.log'.format(uid))
+		self.pth_debug_log = os.path.join(
+			pth_logs, 'DEBUG_{}.log{}'.format(uid, constants.Logging.compressed_extension))
 		self.pth_progress_log = os.path.join(pth_logs, 'INFO_{}.log'.format(uid))
 		self.pth_error_log = os.path.join(pth_logs, 'ERROR_{}.log'.format(uid))
 		self.app = app
@@ -299,7 +308,8 @@ class Logger:
 
 		# Check each file to see if it can be created or if it even exists, if not then use script directory
 		if self.pth_debug_log is None:
-			file_name = '{}_{}{}'.format(self.log_constants.debug, uid, self.log_constants.extension)
+			file_name = '{}_{}{}{}'.format(
+				self.log_constants.debug, uid, self.log_constants.extension, self.log_constants.compressed_extension)
 			self.pth_debug_log = os.path.join(parent_pth, file_name)
 
 		if self.pth_progress_log is None:
@@ -320,6 +330,10 @@ class Logger:
 		# logging.getLogger().setLevel(logging.CRITICAL)
 		# logging.getLogger().disabled = True
 		logger = logging.getLogger(self.log_constants.logger_name)
+		# Stop the listener of any previous setup so that its messages are written before the handlers are replaced
+		for handler in logger.handlers:
+			if isinstance(handler, log_handlers.QueueHandler) and handler.listener is not None:
+				handler.listener.stop()
 		logger.handlers = []
 
 		# Ensures that even debug messages are captured even if they are not written to log file
@@ -334,9 +348,12 @@ class Logger:
 			pth=self.pth_progress_log, min_level=logging.INFO, _buffer=True, flush_level=logging.ERROR,
 			formatter=log_formatter)
 
-		self.handler_debug_log = self.get_file_handlers(
-			pth=self.pth_debug_log, min_level=logging.DEBUG, _buffer=True, flush_level=logging.CRITICAL,
-			buffer_cap=100000, formatter=log_formatter)
+		# Only the most recent debug messages are kept and they are only written (compressed) if a CRITICAL message
+		# occurs or dump_debug_log is called
+		self.handler_debug_log = log_handlers.RingBufferHandler(
+			pth=self.pth_debug_log, capacity=self.log_constants.debug_records, flush_level=logging.CRITICAL)
+		self.handler_debug_log.setFormatter(log_formatter)
+		self.handler_debug_log.setLevel(logging.DEBUG)
 
 		self.handler_error_log = self.get_file_handlers(
 			pth=self.pth_error_log, min_level=logging.ERROR, formatter=log_formatter)
@@ -354,11 +371,22 @@ class Logger:
 		# Added in later if not running from PSSE
 		# #self.handler_stream_log.emit = decorate_emit(self.handler_stream_log.emit)
 
-		# Add handlers to logger
-		logger.addHandler(self.handler_progress_log)
-		logger.addHandler(self.handler_debug_log)
-		logger.addHandler(self.handler_error_log)
-		logger.addHandler(self.handler_stream_log)
+		# Handlers are run by a listener on a background thread so that formatting and writing the log messages does not
+		# hold up the code that logs them, the logger just puts each message on the queue
+		log_queue = Queue.Queue()
+		self.listener = log_handlers.QueueListener(
+			log_queue, self.handler_progress_log, self.handler_debug_log, self.handler_error_log,
+			self.handler_stream_log)
+		queue_handler = log_handlers.QueueHandler(log_queue)
+		queue_handler.listener = self.listener
+		self.listener.start()
+		# Any messages still on the queue are written before the process exits, only the most recent setup needs to be
+		# stopped since the listener of any previous setup has been stopped above
+		global active_logger
+		active_logger = self
+
+		# Add handler to logger
+		logger.addHandler(queue_handler)
 
 		return logger
 
@@ -369,7 +397,7 @@ class Logger:
 		"""
 		# Initial announcement of directories for log messages to be saved in
 		self.info(
-			'Path for debug log is {} and will be created if any WARNING messages occur'.format(self.pth_debug_log))
+			'Path for debug log is {} and will be created if any CRITICAL messages occur'.format(self.pth_debug_log))
 		self.info(
 			'Path for process log is {} and will contain all INFO and higher messages'.format(self.pth_progress_log))
 		self.info(
@@ -381,9 +409,28 @@ class Logger:
 		)
 
 		# Ensure initial log messages are created and saved to log file
+		self.listener.flush()
 		self.handler_progress_log.flush()
 		return None
 
+	def stop_listener(self):
+		"""
+			Function run as the process exits, the psspy report (if recording psspy calls) is written while the listener
+			is still running so that it reaches the log files and then any messages still on the queue are written
+		:return None:
+		"""
+		psspy_profiler.write_report()
+		self.listener.stop()
+		return None
+
+	def dump_debug_log(self):
+		"""
+			Function writes the most recent debug messages to the compressed debug log
+		:return int records:  Number of messages written
+		"""
+		self.listener.flush()
+		return self.handler_debug_log.dump()
+
 	def close_logging(self):
 		"""Function closes logging but first removes the debug_handler so that the output is not flushed on
 			completion.
@@ -391,12 +438,13 @@ class Logger:
 		# Close the debug handler so that no debug outputs will be written to the log files again
 		# This is a safe close of the logger and any other close, i.e. an exception will result in writing the
 		# debug file.
-		# Flush existing progress and error logs
+		# Write any messages still on the queue and then flush existing progress and error logs
+		self.listener.flush()
 		self.handler_progress_log.flush()
 		self.handler_error_log.flush()
 
 		# Specifically remove the debug_handler
-		self.logger.removeHandler(self.handler_debug_log)
+		self.listener.handlers = [x for x in self.listener.handlers if x is not self.handler_debug_log]
 
 		# Close and delete file handlers so no more logs will be written to file
 		for handler in reversed(self.file_handlers):
@@ -519,6 +567,8 @@ class Logger:
 			)
 		else:
 			self.logger.info('Log file closing, there were 0 important messages')
+		# Report on the psspy calls is written before logging is shut down
+		psspy_profiler.write_report()
 		self.logger.debug('Logging stopped')
 		logging.shutdown()
 
@@ -550,3 +600,20 @@ class Logger:
 		:return None:
 		"""
 		self.logging_final_report_and_closure()
+
+
+# Logger whose listener is stopped as the process exits, registered once rather than for every setup of the logging
+active_logger = None
+
+
+def stop_active_logger():
+	"""
+		Function run as the process exits to write any messages still on the queue of the most recent logger
+	:return None:
+	"""
+	if active_logger is not None:
+		active_logger.stop_listener()
+	return None
+
+
+atexit.register(stop_active_logger)
@@ -0,0 +1,121 @@
+"""
+#######################################################################################################################
+###											Batch Load Estimate Ingest												###
+###		Processes several load estimate workbooks (i.e. licence areas or revisions) in parallel					###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import time
+import logging
+import collections
+import multiprocessing
+# Unique imports
+import common_functions as common
+import constants as constants
+import dataframe_maker_modifier
+import export_service
+import ingest_cache
+
+
+def output_folders(workbooks, output_folder=None):
+    """
+        Function returns a separate output folder for each workbook named after the workbook, if more than one
+        workbook has the same name then a number is added so that their outputs never overwrite each other
+    :param list workbooks:  Full paths to the load estimate workbooks
+    :param str output_folder:  (optional=None) - Folder to create the output folders in, defaults to a batch output
+                                folder within this folder
+    :return collections.OrderedDict folders:  Output folder for each workbook keyed by a unique name for the workbook
+    """
+    if output_folder is None:
+        output_folder = common.get_local_file_path(file_name=common.BatchIngestConstants.output_folder)
+
+    folders = collections.OrderedDict()
+    for xl_path in workbooks:
+        name = os.path.splitext(os.path.basename(xl_path))[0]
+        key = name
+        n = 1
+        while key in folders:
+            n += 1
+            key = '{}_{}'.format(name, n)
+        folders[key] = os.path.join(output_folder, key)
+
+    return folders
+
+
+def ingest_workbook(job):
+    """
+        Function processes a single workbook, run in a separate process so must only take and return values that can
+        be pickled
+    :param tuple job:  (xl_path, output_folder, use_cache, cache_folder) for the workbook
+    :return collections.OrderedDict frames:  DataFrames keyed by their dill names
+    """
+    xl_path, output_folder, use_cache, cache_folder = job
+    logger = logging.getLogger(constants.Logging.logger_name)
+    t0 = time.time()
+
+    if use_cache:
+        # Cache entries are keyed by the workbook content so each workbook has its own entries, the outputs stored with
+        # the entry are written to the output folder if the workbook has been processed before
+        frames = ingest_cache.IngestCache(cache_folder=cache_folder).load_or_process(
+            xl_path=xl_path, output_folder=output_folder)
+    else:
+        frames = dataframe_maker_modifier.process_load_estimates(
+            xl_path=xl_path, dill=True, output_folder=output_folder)
+
+    # Outputs must have been written before the process is finished with
+    export_service.exporter.wait()
+    logger.info('Workbook {} processed in {:.2f} seconds'.format(os.path.basename(xl_path), time.time() - t0))
+
+    return frames
+
+
+def batch_ingest(workbooks, output_folder=None, processes=None, use_cache=True, cache_folder=None):
+    """
+        Function processes several load estimate workbooks in parallel, each in its own process and with its outputs
+        (workbooks, comparison, dills and run report) written to its own folder
+    :param list workbooks:  Full paths to the load estimate workbooks
+    :param str output_folder:  (optional=None) - Folder to create the output folder for each workbook in
+    :param int processes:  (optional=None) - Number of processes to use, defaults to the number of CPUs, if 1 then the
+                            workbooks are processed one after the other in this process
+    :param bool use_cache:  (optional=True) - If True then workbooks that have been processed before are loaded from
+                            the ingest cache
+    :param str cache_folder:  (optional=None) - Folder for the ingest cache, defaults to the cache used by the GUI
+    :return collections.OrderedDict results:  For each workbook keyed by its unique name a dictionary with the path to
+                                                the workbook, the output folder and the processed DataFrames
+    """
+    logger = logging.getLogger(constants.Logging.logger_name)
+    folders = output_folders(workbooks=workbooks, output_folder=output_folder)
+    jobs = [(xl_path, folder, use_cache, cache_folder) for xl_path, folder in zip(workbooks, folders.values())]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(jobs)))
+
+    t0 = time.time()
+    if processes == 1:
+        processed = map(ingest_workbook, jobs)
+    else:
+        pool = multiprocessing.Pool(processes=processes)
+        try:
+            processed = pool.map(ingest_workbook, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    results = collections.OrderedDict()
+    for (key, folder), xl_path, frames in zip(folders.iteritems(), workbooks, processed):
+        results[key] = {
+            common.BatchIngestConstants.xl_path: xl_path,
+            common.BatchIngestConstants.output_folder_key: folder,
+            common.BatchIngestConstants.frames: frames
+        }
+
+    logger.info('{} workbooks processed using {} process(es) in {:.2f} seconds'.format(
+        len(jobs), processes, time.time() - t0))
+
+    return results
@@ -13,9 +13,12 @@ import os
 import sys
 import re
 import pandas as pd
+import numpy as np
 from scipy import interpolate
 import dill
 import collections
+# Unique imports
+import instrumentation
 
 # Meta Data
 __author__ = 'David Mills'
@@ -25,6 +28,7 @@ __phone__ = '+44 7899 984158'
 __status__ = 'Alpha'
 
 
+@instrumentation.instrumented
 def import_raw_load_estimates(pth_load_est, sheet_name='MASTER Based on SubstationLoad'):
     """
         Function imports the raw load estimate into a DataFrame with no processing of the data
@@ -153,6 +157,22 @@ class Headers:
     sum_percentages = 'sum_percentages'
 
 
+# noinspection PyClassHasNoInit
+class CompactDtypes:
+    """
+        Compact data types the processed DataFrames are converted to before they are returned or dilled
+    """
+    # Columns that mark the type of substation (True or empty) are stored as bool
+    flags = (Headers.sub_gsp, Headers.sub_primary)
+    # Columns of names which are repeated for many rows are stored as categories
+    categories = (Headers.gsp, Headers.name, Headers.voltage, 'TX Details', 'Historic Trend', 'Forecasting')
+    # Columns starting with this are PSS/E bus numbers and are stored as nullable integers
+    bus_prefix = 'PSS/E Bus'
+    bus_dtype = 'Int32'
+    # Any other columns which contain only numbers are stored as floats
+    float_dtype = 'float64'
+
+
 class powerfactor:
     """
         Headers used as part of the DataFrame
@@ -175,6 +195,19 @@ class Seasons:
     primary_summer_val = float
     primary_min_demand_val = float
 
+    # Each missing or non positive season value is filled with the quantile of the available values of that season for
+    # the same type of substation, (season column, substation type column, quantile, attribute the value is saved as)
+    quantile_fills = (
+        (Headers.spring_autumn, Headers.sub_gsp, spring_autumn_q, 'gsp_spring_autumn_val'),
+        (Headers.summer, Headers.sub_gsp, summer_q, 'gsp_summer_val'),
+        (Headers.min_demand, Headers.sub_gsp, min_demand_q, 'gsp_min_demand_val'),
+        (Headers.spring_autumn, Headers.sub_primary, spring_autumn_q, 'primary_spring_autumn_val'),
+        (Headers.summer, Headers.sub_primary, summer_q, 'primary_summer_val'),
+        (Headers.min_demand, Headers.sub_primary, min_demand_q, 'primary_min_demand_val')
+    )
+    # Values calculated for each entry in quantile_fills keyed by (season column, substation type column)
+    quantile_values = collections.OrderedDict()
+
 
 def interpolator(t1):
     """
@@ -202,6 +235,39 @@ def interpolator(t1):
     return y_estimated_df
 
 
+def batch_interpolator(y):
+    """
+    Function fills the missing values of every row of a 2D array in a single pass using the column positions as x.
+    Values between two known points are linearly interpolated and values before the first or after the last known
+    point are linearly extrapolated from the two nearest known points, giving the same result as interpolator for each
+    row.  Every row must have at least two known values.
+    :param np.ndarray y:  2D array of values with the missing values as nan
+    :return np.ndarray y_estimated:  2D array with the missing values filled in
+    """
+    y = np.array(y, dtype=float)
+    idx_known = ~np.isnan(y)
+    rows = np.arange(y.shape[0])[:, np.newaxis]
+
+    # Column positions of the known values for each row, in order, followed by those of the missing values
+    known_positions = np.argsort(~idx_known, axis=1, kind='mergesort')
+    number_known = idx_known.sum(axis=1)[:, np.newaxis]
+
+    # For each value the known points either side of it, matching the search interp1d carries out, where there is no
+    # known point on one side the two nearest known points on the other side are used
+    hi = np.clip(np.cumsum(idx_known, axis=1) - idx_known, 1, number_known - 1)
+    lo = hi - 1
+    x_lo = known_positions[rows, lo].astype(float)
+    x_hi = known_positions[rows, hi].astype(float)
+    y_lo = y[rows, known_positions[rows, lo]]
+    y_hi = y[rows, known_positions[rows, hi]]
+
+    x_new = np.arange(y.shape[1], dtype=float)[np.newaxis, :]
+    slope = (y_hi - y_lo) / (x_hi - x_lo)
+    y_estimated = np.where(idx_known, y, slope * (x_new - x_lo) + y_lo)
+
+    return y_estimated
+
+
 # noinspection PyClassHasNoInit
 class ExcelFileNames:
     """
@@ -331,6 +397,55 @@ class folder_file_names:
     dill_modified_data='df_modified'
 
 
+# noinspection PyClassHasNoInit
+class IngestCacheConstants:
+    """
+        Constants for the cache of processed load estimate DataFrames
+    """
+    cache_folder = 'ingest_cache'
+    extension = '.dill'
+    # Entries not used for this many days are evicted
+    max_age_days = 30
+    # Least recently used entries are evicted once the cache exceeds this size
+    max_size_mb = 200
+    hash_block_size = 1024 * 1024
+    # Increased whenever the form of the cached DataFrames changes so that older entries are not used
+    format_version = 4
+    # Keys of each cache entry
+    metadata = 'metadata'
+    frames = 'frames'
+    artefacts = 'artefacts'
+    # DataFrames stored in each entry
+    cached_variables = [
+        folder_file_names.dill_raw_data, folder_file_names.dill_modified_data,
+        folder_file_names.dill_good_data_name, folder_file_names.dill_bad_data_name
+    ]
+    # Outputs written when a workbook is processed, relative to the output folder, which are stored with each entry
+    # and written again whenever the entry is used
+    artefact_files = [
+        ExcelFileNames.data_comparison_excel_name, ExcelFileNames.df_raw_excel_name,
+        ExcelFileNames.df_modified_excel_name, ExcelFileNames.good_data_excel_name,
+        ExcelFileNames.bad_data_excel_name
+    ] + [
+        os.path.join(folder_file_names.dill_folder, '{}.dill'.format(x)) for x in (
+            folder_file_names.dill_raw_data, folder_file_names.dill_modified_data,
+            folder_file_names.dill_good_data_name, folder_file_names.dill_bad_data_name)
+    ]
+
+
+# noinspection PyClassHasNoInit
+class BatchIngestConstants:
+    """
+        Constants for processing several load estimate workbooks at once
+    """
+    # Each workbook has its own folder within this one for its workbooks, dills and run report
+    output_folder = 'batch_output'
+    # Keys of the result returned for each workbook
+    xl_path = 'xl_path'
+    output_folder_key = 'output_folder'
+    frames = 'frames'
+
+
 def get_local_file_path_with_folder(file_name, folder_name):
     """
         Function returns the full path to a file (it gets the new folder as well) which is stored in the same directory
@@ -359,6 +474,7 @@ class FolderFileNames:
     variable_dict = collections.OrderedDict()
 
 
+@instrumentation.instrumented
 def batch_dill_maker_loader_no_xl(variable_value_list, variable_list, variables_to_be_dilled, load_dill,
                                   dill_folder_name):
     """
@@ -423,6 +539,7 @@ def batch_dill_maker_loader_no_xl(variable_value_list, variable_list, variables_
     return variable_dict
 
 
+@instrumentation.instrumented
 def batch_dill_maker_loader(input_list, sheet_list, variable_list, variables_to_be_dilled, load_dill, dill_folder_name):
     """
     Function gets  a list of excel file names with.xlsx (input_list), the sheet_list, and the variable name list which it would be
@@ -501,11 +618,22 @@ def load_dill(variable_name, dill_folder_name):
     variable_dict = batch_dill_maker_loader_no_xl(variable_value_list=i, variable_list=variable_name,
                                                   variables_to_be_dilled=dill_or_not, load_dill=load_dill,
                                                   dill_folder_name=dill_folder_name)
-    df = variable_dict[variable_name[0]]
-    if 'index' in list(df.columns):
-        df = df.drop(['index'], axis=1)
+    df = dill_to_df(df=variable_dict[variable_name[0]])
 
-    df = df.set_index((list(df.columns)[0]))
+    return df
+
+
+def dill_to_df(df):
+    """
+        Function restores the index of a dataframe as saved in a dill, the index is the first column (named index when
+        the dataframe was dilled directly or Unnamed: 0 when it was read back from an exported workbook)
+    :param pd df:  dataframe as saved in the dill
+    :return pd df:  dataframe with its index restored
+    """
+    if 'index' in list(df.columns):
+        df = df.set_index('index')
+    else:
+        df = df.set_index((list(df.columns)[0]))
 
     return df
 
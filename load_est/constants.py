@@ -71,9 +71,6 @@ class XlFileConstants:
 	sheet2 = 'Missing Load Data'
 	sheet3 = 'Amended Load Data'
 
-	# define good data and bad data dataframes
-	good_data = pd.DataFrame()
-	bad_data = pd.DataFrame()
 	#amend_data=pd.DataFrame() #suggested data in place of missing data
 
 	# define columns from spreadsheet
@@ -105,6 +102,29 @@ class XlFileConstants:
 	# define cell on interest for pf
 	pf_cell_tuple = (3, 7)
 
+	# define the station checks, each check is carried out on the group of columns with the same name in the station
+	# table and its result is written to a column named with the pass suffix
+	station_group = 'station'
+	pf_group = 'pf'
+	psse_pc_group = 'psse_pc'
+	peak_mw_check = 'peak_mw'
+	load_forecast_check = 'load_forecast'
+	seasonal_percent_check = 'seasonal_percent'
+	psse_buses_check = 'psse_buses'
+	pass_suffix = '_pass'
+	station_pass = 'Station_data_pass'
+	max_demand_str = 'Maximum Demand'
+
+	# define the levels of the station table index
+	station_table_index = ['gsp_key', 'st_type', 'row']
+
+	# define the labels given to each row of the worksheet when it is split into GSP and station blocks, rows which are
+	# not part of a GSP are labelled -1
+	gsp_label = 'gsp_id'
+	block_label = 'block_id'
+	gsp_name_label = 'gsp_key'
+	row_label = 'row'
+
 	def __init__(self):
 		pass
 
@@ -119,6 +139,16 @@ class XlFileConstants:
 
 class SavedParamsStrings:
 
+	# the params are saved as a small header which is all the GUI needs to start and the station data which is only
+	# loaded when it is first needed, the version is increased whenever the format of either file changes
+	params_header_name = 'SSE_LE_params.json'
+	params_data_name = 'SSE_LE_params.npz'
+	params_version = 1
+	version_str = 'version'
+	station_data_str = 'station_data'
+	# name of the array in the station data which holds the text values
+	text_str = 'text'
+	# dill of the whole params dict, only still used by Load_Estimates_to_PSSE_N1
 	params_file_name = 'SSE_LE_params.pkl'
 
 	scalable_GSP_list_str = 'scalable_GSP_list'
@@ -544,6 +574,8 @@ class BkdyFileOutput:
 class Loads:
 	bus = 'NUMBER'
 	load = 'MVAACT'
+	# Nominal constant MVA load, equivalent to the P and Q values set by load_chng_4
+	load_nominal = 'MVANOM'
 	identifier = 'ID'
 	status='STATUS'
 	zone='ZONE'
@@ -569,6 +601,7 @@ class Machines:
 	xneg = 'XNEG'
 	xzero = 'XZERO'
 	zsource = 'ZSORCE'
+	pqgen = 'PQGEN'
 	rsource = 'R Source'
 	xsource = 'X Source'
 
@@ -590,6 +623,8 @@ class Machines:
 	min_r_pos = 0.0
 	# Assumed X/R value when they are missing
 	assumed_x_r = 40.0
+	# Machines with this RPOS value are excluded from generation scaling
+	rpos_not_scaled = 999
 
 	bkdy_col_order = [bus, identifier, t1d0, t11d0, t1q0, t11q0, xd, xq, x1d, x1q, x11]
 
@@ -639,6 +674,63 @@ class Logging:
 	progress = 'INFO'
 	error = 'ERROR'
 	extension = '.log'
+	# name of the thread that formats and writes the log messages
+	listener_thread_name = 'JK7938_log_listener'
+	# number of items listed when the messages for each item in a loop are collapsed into a summary
+	summary_examples = 10
+	# number of the most recent records kept for the debug log and the extension of the compressed file it is dumped to
+	debug_records = 20000
+	compressed_extension = '.gz'
+
+	def __init__(self):
+		"""
+			Just included to avoid Pycharm error message
+		"""
+		pass
+
+
+class Instrumentation:
+	"""
+		Constants used for the per stage timing and memory instrumentation
+	"""
+	# Setting this environment variable to anything other than an empty string or 0 switches the instrumentation off
+	disable_env = 'JK7938_DISABLE_INSTRUMENTATION'
+	report_name = 'run_report'
+	extension = '.json'
+
+	def __init__(self):
+		"""
+			Just included to avoid Pycharm error message
+		"""
+		pass
+
+
+class PsspyProfiling:
+	"""
+		Constants used for recording the calls made to psspy
+	"""
+	# Setting this environment variable to anything other than an empty string or 0 switches the recording on
+	enable_env = 'JK7938_PROFILE_PSSPY'
+	report_name = 'psspy_report'
+	extension = '.json'
+	percentiles = (50, 90, 99)
+	# number of calling sites included in the report for each function
+	max_sites = 5
+
+	def __init__(self):
+		"""
+			Just included to avoid Pycharm error message
+		"""
+		pass
+
+
+class Export:
+	"""
+		Constants used for the background export of Excel workbooks
+	"""
+	# Maximum number of exports waiting to be written before submitting another one blocks
+	max_queue = 8
+	thread_name = 'JK7938_export'
 
 	def __init__(self):
 		"""
@@ -9,12 +9,16 @@
 """
 
 # Generic Imports
+import datetime
+import itertools
 import pandas as pd
 import numpy as np
+import xlsxwriter
 import unittest
 
 # Unique imports
 import common_functions as common
+import instrumentation
 
 # General Constants
 FILE_NAME_INPUT_1 = 'Processed Load Estimates_p_non_modified.xlsx'
@@ -31,6 +35,11 @@ FILE_PTH_OUTPUT = common.get_local_file_path(file_name=FILE_NAME_OUTPUT)
 # Engine to use when writing excel workbooks (XlsxWriter needed for formatting of tabs)
 excel_engine = 'xlsxwriter'
 
+# Formats matching those pandas uses when writing a DataFrame to excel
+header_format = {'bold': True, 'top': 1, 'right': 1, 'bottom': 1, 'left': 1, 'align': 'center', 'valign': 'top'}
+datetime_format = 'YYYY-MM-DD HH:MM:SS'
+date_format = 'YYYY-MM-DD'
+
 
 # Functions
 def produce_dataframe(dimensions, row_num):
@@ -100,6 +109,119 @@ def compare_dataframes(df1, df2):
 	return local_df_diff, df2_styled
 
 
+def difference_mask(df1, df2):
+	"""
+		Function returns a boolean array identifying the cells in df2 which have a value that is different to df1, these
+		are the same cells that compare_dataframes highlights
+	:param pd.DataFrame df1:  DataFrame 1
+	:param pd.DataFrame df2:  DataFrame 2
+	:return np.ndarray is_diff:  Boolean array with the same dimensions as the DataFrames
+	"""
+	# Confirm that DataFrames are the same dimensions otherwise raise error
+	if df1.shape != df2.shape:
+		raise ValueError('The two DataFrames provided are not the same dimensions ({} != {})'.format(df1.shape, df2.shape))
+
+	is_diff = ((df2 != df1) & df2.notna()).values
+
+	return is_diff
+
+
+class DataFrameWriter:
+	"""
+		Writes DataFrames to a workbook one row at a time so that the workbook can be opened in constant_memory mode,
+		each format is only created once and cells are only formatted if they need to be highlighted
+	"""
+
+	def __init__(self, workbook, color='yellow'):
+		"""
+		:param xlsxwriter.Workbook workbook:  Workbook to write to
+		:param str color:  (optional='yellow') - Colour to highlight cells
+		"""
+		self.workbook = workbook
+		self.color = color
+		self.formats = dict()
+
+	def cell_format(self, header=False, highlight=False, num_format=None):
+		"""
+			Function returns the format to use for a cell
+		:param bool header:  Whether the cell is a header or index cell
+		:param bool highlight:  Whether the cell should be highlighted
+		:param str num_format:  Number format for the cell (i.e. for dates)
+		:return xlsxwriter.format.Format cell_format:  Format or None if the cell does not need formatting
+		"""
+		key = (header, highlight, num_format)
+		if key not in self.formats:
+			properties = dict()
+			if header:
+				properties.update(header_format)
+			if highlight:
+				properties.update({'pattern': 1, 'fg_color': self.color})
+			if num_format:
+				properties['num_format'] = num_format
+			self.formats[key] = self.workbook.add_format(properties) if properties else None
+
+		return self.formats[key]
+
+	def write_cell(self, wksh, row, col, value, header=False, highlight=False):
+		"""
+			Function writes a single value in the same way pandas does, missing values are left empty
+		:param xlsxwriter.worksheet.Worksheet wksh:  Worksheet to write to
+		:param int row:  Row number
+		:param int col:  Column number
+		:param value:  Value to write
+		:param bool header:  Whether the cell is a header or index cell
+		:param bool highlight:  Whether the cell should be highlighted
+		:return None:
+		"""
+		num_format = None
+		if value is None or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+			return None
+		elif isinstance(value, float) and np.isinf(value):
+			value = 'inf' if value > 0 else '-inf'
+		elif isinstance(value, datetime.datetime):
+			num_format = datetime_format
+		elif isinstance(value, datetime.date):
+			num_format = date_format
+
+		wksh.write(row, col, value, self.cell_format(header=header, highlight=highlight, num_format=num_format))
+
+		return None
+
+	def write(self, df, sheet_name, tab_color=None, highlight=None):
+		"""
+			Function writes a DataFrame to a new worksheet including the index and column headers
+		:param pd.DataFrame df:  Data to be written
+		:param str sheet_name:  Name to give worksheet
+		:param str tab_color:  (optional=None) - Color for tab
+		:param np.ndarray highlight:  (optional=None) - Boolean array of the cells in df to highlight
+		:return None:
+		"""
+		wksh = self.workbook.add_worksheet(name=sheet_name)
+
+		# Only set tab_color if not None
+		if tab_color:
+			wksh.set_tab_color(tab_color)
+
+		# Header row
+		if df.index.name is not None:
+			self.write_cell(wksh=wksh, row=0, col=0, value=df.index.name, header=True)
+		for col, value in enumerate(df.columns, 1):
+			self.write_cell(wksh=wksh, row=0, col=col, value=value, header=True)
+
+		# Rows are written in order since once a row is finished it is flushed to disk
+		for row, (idx, values) in enumerate(itertools.izip(df.index, df.itertuples(index=False)), 1):
+			self.write_cell(wksh=wksh, row=row, col=0, value=idx, header=True)
+			if highlight is None:
+				for col, value in enumerate(values, 1):
+					self.write_cell(wksh=wksh, row=row, col=col, value=value)
+			else:
+				highlight_row = highlight[row - 1]
+				for col, value in enumerate(values, 1):
+					self.write_cell(wksh=wksh, row=row, col=col, value=value, highlight=highlight_row[col - 1])
+
+		return None
+
+
 def write_dataframe(workbook, df, sheet_name, tab_color=None):
 	"""
 		Function deals with writing a DataFrame to new worksheet in excel whilst also formatting the worksheet tab
@@ -128,48 +250,67 @@ def write_dataframe(workbook, df, sheet_name, tab_color=None):
 
 def excel_data_comparison_maker(FILE_NAME_INPUT_1,FILE_NAME_INPUT_2,Bad_Data_Input_Name,Good_Data_Input_Name):
 	"""
-			Function compares two DataFrames of the same size and returns a dataframe of the same dimensions but with only
-			the differences shown.  Keeps values in df2
-		:param pd.DataFrame df1:  DataFrame 1
-		:param pd.DataFrame df2:  DataFrame 2
-		:return (pd.DataFrame, pd.DataFrame.Styled) (df_diff, df2_styled):  Different values between DataFrames and
-																			original dataframe with changes highlighted
-		"""
-	# todo: modify the description
-
+		Function imports the raw, modified, bad and good data workbooks and writes them to a single comparison workbook
+		with the differences between the raw and modified data highlighted
+	:param str FILE_NAME_INPUT_1:  Name of the raw data workbook
+	:param str FILE_NAME_INPUT_2:  Name of the modified data workbook
+	:param str Bad_Data_Input_Name:  Name of the bad data workbook
+	:param str Good_Data_Input_Name:  Name of the good data workbook
+	:return None:
+	"""
 	FILE_PTH_INPUT_1 = common.get_local_file_path(file_name=FILE_NAME_INPUT_1)
 	FILE_PTH_INPUT_2 = common.get_local_file_path(file_name=FILE_NAME_INPUT_2)
 	FILE_PTH_INPUT_Bad_Data = common.get_local_file_path(file_name=Bad_Data_Input_Name)
 	FILE_PTH_INPUT_Good_Data = common.get_local_file_path(file_name=Good_Data_Input_Name)
 
-	FILE_NAME_OUTPUT = common.ExcelFileNames.data_comparison_excel_name
-	FILE_PTH_OUTPUT = common.get_local_file_path(file_name=FILE_NAME_OUTPUT)
-
-	# Engine to use when writing excel workbooks (XlsxWriter needed for formatting of tabs)
-	excel_engine = 'xlsxwriter'
-
-
 	df_main=common.import_excel(pth_load_est=FILE_PTH_INPUT_1)
 	df_modified = common.import_excel(pth_load_est=FILE_PTH_INPUT_2)
 	df_bad_data = common.import_excel(pth_load_est=FILE_PTH_INPUT_Bad_Data)
 	df_good_data = common.import_excel(pth_load_est=FILE_PTH_INPUT_Good_Data)
 
-	# Compare DataFrames to get differences and an updated df_modified with cells highlighted
-	df_diff, df_modified_styled = compare_dataframes(df1=df_main, df2=df_modified)
+	data_comparison_maker(
+		df_main=df_main, df_modified=df_modified, df_bad_data=df_bad_data, df_good_data=df_good_data)
 
-	# Write DataFrames to excel workbook
-	# Create an instance of excel
-	with pd.ExcelWriter(path=FILE_PTH_OUTPUT, engine=excel_engine) as wkbk:
+	return None
+
+
+@instrumentation.instrumented
+def data_comparison_maker(df_main, df_modified, df_bad_data, df_good_data, pth_output=None):
+	"""
+		Function compares the raw and modified DataFrames and writes them to a single comparison workbook, along with
+		the differences between them and the bad and good data, with the cells that have changed highlighted
+	:param pd.DataFrame df_main:  Raw data
+	:param pd.DataFrame df_modified:  Modified data, must be the same dimensions as df_main
+	:param pd.DataFrame df_bad_data:  Bad data
+	:param pd.DataFrame df_good_data:  Good data
+	:param str pth_output:  (optional=None) - Full path to the workbook to write, defaults to the data comparison
+							workbook in this folder
+	:return pd.DataFrame df_diff:  Values in df_modified which are different to df_main
+	"""
+	if pth_output is None:
+		pth_output = common.get_local_file_path(file_name=common.ExcelFileNames.data_comparison_excel_name)
+
+	# Compare DataFrames once to get the cells which have changed, the differences are the values in df_modified for
+	# those cells
+	is_diff = difference_mask(df1=df_main, df2=df_modified)
+	df_diff = df_modified.where(is_diff)
+
+	# Write DataFrames to excel workbook, rows are written in order so the workbook can be kept in constant memory mode
+	wkbk = xlsxwriter.Workbook(pth_output, {'constant_memory': True})
+	try:
+		writer = DataFrameWriter(workbook=wkbk)
 		# Write main data
-		write_dataframe(workbook=wkbk, df=df_main, sheet_name='Raw Data')
-		# Write modified data
-		write_dataframe(workbook=wkbk, df=df_modified_styled, sheet_name='Modified Data', tab_color='green')
+		writer.write(df=df_main, sheet_name='Raw Data')
+		# Write modified data with the cells which have changed highlighted
+		writer.write(df=df_modified, sheet_name='Modified Data', tab_color='green', highlight=is_diff)
 		# Write difference data
-		write_dataframe(workbook=wkbk, df=df_diff, sheet_name='Difference Data', tab_color='blue')
-		write_dataframe(workbook=wkbk, df=df_bad_data, sheet_name='Bad Data', tab_color='red')
-		write_dataframe(workbook=wkbk, df=df_good_data, sheet_name='Good Data')
-	k=1
+		writer.write(df=df_diff, sheet_name='Difference Data', tab_color='blue')
+		writer.write(df=df_bad_data, sheet_name='Bad Data', tab_color='red')
+		writer.write(df=df_good_data, sheet_name='Good Data')
+	finally:
+		wkbk.close()
 
+	return df_diff
 
 
 if __name__ == '__main__':
@@ -9,15 +9,24 @@
 """
 
 # Generic Imports
+import os
 import pandas as pd
 import numpy as np
+import logging
+import collections
 # Unique imports
 import common_functions as common
 import data_comparison as comparison
-import collections
+import constants as constants
+import stage_pipeline
+import instrumentation
+import export_service
+
+logger = logging.getLogger(constants.Logging.logger_name)
 
 
 # Functions
+@instrumentation.instrumented
 def assign_gsp(df_raw):
     """
 		Function to assign a GSP to each Primary substation included within the dataset
@@ -32,6 +41,7 @@ def assign_gsp(df_raw):
     return df_raw
 
 
+@instrumentation.instrumented
 def determine_gsp_primary_flag(df_raw):
     """
 		Determines whether a row contains GSP or Primary substation data
@@ -64,9 +74,12 @@ def determine_gsp_primary_flag(df_raw):
     return df_raw
 
 
+@instrumentation.instrumented
 def bus_percentage_adder_modified(df_raw, fill):
     """
-		adds the buses percentages as a new column
+		adds the buses percentages as a new column, the percentage for each busbar is taken from the row below the
+		busbar number.  Missing percentages are left as NaN unless fill is True in which case whatever is left of
+		100% is shared equally between the missing busbars of that substation.
 	:param pd.DataFrame df_raw:
 	:param bool fill:  Whether to fill values or not
 	:return pd.DataFrame df_raw:
@@ -77,47 +90,37 @@ def bus_percentage_adder_modified(df_raw, fill):
         bus_list
     ]  # makes a new list of column headers with the existing psse bus list
 
-    bus_percentage_dict = collections.OrderedDict()
-    percentage_miss_list = []
-    df_raw[common.Headers.sum_percentages] = pd.Series([0 for _ in range(len(df_raw.index))])
-
-    for b in percentage_list:  # this adds nan columns for the headers listed
-        df_raw[b] = np.nan
-
-    for b in bus_list:
-        idx = (
-                (
-                        ~df_raw[common.Headers.sub_gsp].isna() |  # filters the rows that are gsp
-                        ~df_raw[common.Headers.sub_primary].isna()
-                ) &  # filters the rows that are primary
-                ~df_raw[b].isna()
-        )  # Confirm that the pss bus column has a name assigned to it
-
-        bus_percentage_dict[b] = idx[
-            idx == True].index  # makes a dictionary with psse bus column names as keys and with the index of the
-    # rows with bus names as the values
-
-    for n in range(0, len(bus_list)):
-        for local_id in bus_percentage_dict[bus_list[n]]:
-            if pd.isnull(df_raw.loc[local_id + 1, bus_list[n]]):
-                df_raw.loc[local_id, percentage_list[n]] = 'missing'
-                percentage_miss_list.append(local_id)
-            else:
-                df_raw.loc[local_id, percentage_list[n]] = df_raw.loc[
-                    local_id + 1, bus_list[n]]  # the percentages of each bus is extracted and added as a new
-                df_raw.loc[local_id, common.Headers.sum_percentages] = (
-                        df_raw.loc[local_id, common.Headers.sum_percentages] + df_raw.loc[local_id, percentage_list[n]]
-                )
+    # Only rows that are a GSP or a Primary have busbars assigned
+    idx_station = (
+            ~df_raw[common.Headers.sub_gsp].isna() |  # filters the rows that are gsp
+            ~df_raw[common.Headers.sub_primary].isna()  # filters the rows that are primary
+    )
+
+    # Busbars that have been assigned and the percentage for each one from the row below
+    df_buses = df_raw[bus_list]
+    idx_bus = df_buses.notna().values & idx_station.values[:, np.newaxis]
+    df_next_row = df_buses.shift(-1)
+    idx_missing = idx_bus & df_next_row.isna().values
+
+    # Percentages are only kept for the busbars that have been assigned, everything else is NaN
+    percentages = df_next_row.where(idx_bus & ~idx_missing).values.astype(float)
+    sum_percentages = np.nansum(percentages, axis=1)
 
     if fill:
-        for i in percentage_miss_list:
-            miss_row = df_raw.loc[i, percentage_list]
-            miss_row_subset = miss_row.loc[miss_row[percentage_list] == 'missing'].index
-            df_raw.loc[i, miss_row_subset] = (1 - df_raw.loc[i, common.Headers.sum_percentages]) / len(miss_row_subset)
+        # Share whatever is left of 100% equally between the missing busbars of each substation
+        number_missing = idx_missing.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = (1 - sum_percentages) / number_missing
+        percentages = np.where(idx_missing, share[:, np.newaxis], percentages)
+
+    df_raw[common.Headers.sum_percentages] = sum_percentages
+    for n, b in enumerate(percentage_list):
+        df_raw[b] = percentages[:, n]
 
     return df_raw
 
 
+@instrumentation.instrumented
 def extract_aggregate_demand(df_raw):
     """
 		Extract the aggregate demand from the diversified demand for each GSP
@@ -130,48 +133,57 @@ def extract_aggregate_demand(df_raw):
     # Adjust the list to include a leading string value to identify this as a certain type of forecast (i.e aggregate)
     # TODO: Could make use of MultiIndex Pandas DataFrame Columns instead which would allow for more efficient filtering
     adjusted_list = ['{}_{}'.format(common.Headers.aggregate, x) for x in forecast_years]
-    # Add columns to DataFrame with no files by adding in empty
-    df_raw = pd.concat([df_raw, pd.DataFrame(columns=adjusted_list)], sort=False)
 
     # For columns which have been identified as GSP extract the aggregate demand from the row below and add to the GSP
-    # row under the new sections for aggregate demand
-    idx_gsp = df_raw[df_raw[common.Headers.sub_gsp] == True].index
-    # loop through these index values for each GSP and get the aggregate values from the row below
-    for idx in idx_gsp:
-        df_raw.loc[idx, adjusted_list] = df_raw.loc[idx + 1, forecast_years].values
+    # row under the new sections for aggregate demand, all other rows are left empty
+    idx_gsp = df_raw[common.Headers.sub_gsp] == True
+    df_aggregate = df_raw[forecast_years].shift(-1).where(idx_gsp, axis=0).astype(float)
+    for aggregate_year, year in zip(adjusted_list, forecast_years):
+        df_raw[aggregate_year] = df_aggregate[year]
 
     return df_raw
 
 
+@instrumentation.instrumented
 def assign_pf(df_raw, fill):
     """
 		Function to assign a GSP to each Primary substation included within the dataset
 	:param pd.DataFrame df_raw:  Raw dataframe
 	:return pd.DataFrame df:  DataFrame with GSP headers added
 	"""
-    idx_gsp = df_raw[df_raw[common.Headers.sub_gsp] == True].index
-    idx_pf = df_raw[df_raw[common.Headers.pf_column_df_1] == 'Power Factor:'].index
-
-    df_raw[common.Headers.PF] = np.nan
+    idx_gsp = df_raw[common.Headers.sub_gsp] == True
+    idx_pf = df_raw[common.Headers.pf_column_df_1] == 'Power Factor:'
 
-    df_pf = df_raw.loc[idx_pf, :]
+    df_pf = df_raw.loc[idx_pf, common.Headers.pf_column_df]
     idx = (
-            ~df_pf[common.Headers.pf_column_df].isna() &  #
-            ~df_pf[common.Headers.pf_column_df].le(-1) &  #
-            df_pf[common.Headers.pf_column_df].le(1))  #
+            ~df_pf.isna() &  #
+            ~df_pf.le(-1) &  #
+            df_pf.le(1))  #
 
-    common.powerfactor.average_pf = df_pf.loc[idx, common.Headers.pf_column_df].mean()
+    common.powerfactor.average_pf = df_pf[idx].mean()
     if fill:
-        df_pf.loc[~idx, common.Headers.pf_column_df] = common.powerfactor.average_pf
+        df_pf = df_pf.where(idx, common.powerfactor.average_pf)
 
-    for j in range(0, len(idx_gsp)):
-        df_raw.loc[idx_gsp[j], common.Headers.PF] = df_pf.loc[idx_pf[j], common.Headers.pf_column_df]
+    # Each row is keyed by the GSP it belongs to (number of GSP rows at or above it) so that each GSP takes the power
+    # factor from the first Power Factor: row within it, matched by key rather than position, which is then forward
+    # filled to the primaries of that GSP
+    gsp_key = idx_gsp.cumsum()
+    pf_key = gsp_key[idx_pf]
+    df_pf = pd.Series(df_pf.values.astype(float), index=pf_key.values)
+    df_pf = df_pf[~pf_key.duplicated().values]
 
-    df_raw[common.Headers.PF] = df_raw[common.Headers.PF].where(df_raw[common.Headers.sub_gsp] == True).ffill()
+    df_raw[common.Headers.PF] = np.nan
+    df_raw.loc[idx_gsp, common.Headers.PF] = gsp_key[idx_gsp].map(df_pf)
+    if fill:
+        # A GSP without a Power Factor: row is treated the same as one with an invalid power factor
+        df_raw.loc[idx_gsp, common.Headers.PF] = df_raw.loc[idx_gsp, common.Headers.PF].fillna(
+            common.powerfactor.average_pf)
+    df_raw[common.Headers.PF] = df_raw[common.Headers.PF].ffill()
 
     return df_raw
 
 
+@instrumentation.instrumented
 def remove_unnecessary_rows(df_raw):
     """
 		Function removes all of the rows which do not correspond to the usable data for GSP or Primary substations
@@ -191,6 +203,7 @@ def remove_unnecessary_rows(df_raw):
     return df_out
 
 
+@instrumentation.instrumented
 def missing_year_load_estimator(df_raw, fill):
     """
 		Function estimates all the missing years load values for both GSPs and primaries by linear interpolation and
@@ -208,8 +221,9 @@ def missing_year_load_estimator(df_raw, fill):
     df_raw['year_forecasted'] = np.nan
 
     year_estimate_list = ['{}_{}'.format(common.Headers.estimate, x) for x in forecast_years]
-    # Add columns to DataFrame with no files by adding in empty
-    df_raw = pd.concat([df_raw, pd.DataFrame(columns=year_estimate_list)], sort=False)
+    # Add empty float columns to the DataFrame for the estimated values
+    for col in year_estimate_list:
+        df_raw[col] = np.nan
 
     forecast_years = common.adjust_years(headers_list=list(df_raw.columns))
     # todo: maybe add to idx to identify the rows which the values of the loads are negative
@@ -225,32 +239,20 @@ def missing_year_load_estimator(df_raw, fill):
 
     est_row_list = d[d == True].index
 
-    years_estimate_df = df_raw.loc[est_row_list, forecast_years]
-
-    number_of_years = len(years_estimate_df.columns)
-    years_estimate_df.columns = range(number_of_years)
+    if fill and len(est_row_list) > 0:
+        # All rows with missing years are estimated together, common.batch_interpolator uses the position of each year
+        # as x and linearly interpolates between / extrapolates beyond the years that have values
+        years_estimate = df_raw.loc[est_row_list, forecast_years].values.astype(float)
+        idx_missing = np.isnan(years_estimate)
+        estimated_array = common.batch_interpolator(years_estimate)
 
-    if fill:
-
-        for j in range(len(est_row_list)):
-
-            year_row1 = years_estimate_df.loc[est_row_list[j], :]
-            t1 = year_row1.to_frame()
-            estimated_array = common.interpolator(t1).T  # common.interpolator gets a dataframe with one column and
-            # number of indexes equal to the number of years and the missing values as nan, then interpolate the missing
-            # values by using indexes as _ and y being the values in the dataframe, then gives out a df with
-            # the interpolated values
-            n = 0
-            for i in range(len(forecast_years)):
-                if pd.isnull(df_raw.loc[est_row_list[j], forecast_years[i]]):
-                    df_raw.loc[est_row_list[j], forecast_years[i]] = 1
-                    df_raw.loc[est_row_list[j], forecast_years[i]] = estimated_array.iloc[0, n]
-                    df_raw.loc[est_row_list[j], year_estimate_list[i]] = estimated_array.iloc[0, n]
-                    n += 1
+        df_raw.loc[est_row_list, forecast_years] = estimated_array
+        df_raw.loc[est_row_list, year_estimate_list] = np.where(idx_missing, estimated_array, np.nan)
 
     return df_raw
 
 
+@instrumentation.instrumented
 def primary_diverse_load_adder(df_raw):
     """
 		Function calculates the divers factor for all gsp subs and then fill it for primary sub the same value as their
@@ -302,111 +304,48 @@ def primary_diverse_load_adder(df_raw):
     return df_raw
 
 
+@instrumentation.instrumented
 def season_load_filler(df_raw, fill):
     """
 		Function calculates the quantile values for season loads for both GSP and primary substations using available
 		values (non zero and non NA) then saves them as attributes of class seasons (in common), where the percentile
 		values are also setup. Then fill in the missing values for season loads using the calculated quantile values.
+		The seasons, substation types and quantiles used are defined by common.Seasons.quantile_fills and the values
+		calculated are reported in common.Seasons.quantile_values.
 	:param pd.DataFrame df_raw: Input DataFrame to be processed
 	:param bool fill:  Whether to fill data or not
 	:return pd.DataFrame df_out:  Output DataFrame after processing
 	"""
     if fill:
-        idx = (
-                ~df_raw[common.Headers.sub_gsp].isna() &  # Confirm that it's a gsp
-                ~df_raw[common.Headers.spring_autumn].isna() &  # Confirm that a season value is not NA
-                ~df_raw[common.Headers.spring_autumn].le(0))  # Confirm that season value is not negative
-
-        common.Seasons.gsp_spring_autumn_val = np.percentile(
-            df_raw.loc[idx, common.Headers.spring_autumn], common.Seasons.spring_autumn_q
-        )
-
-        idx_change = (
-                ~df_raw[common.Headers.sub_gsp].isna() &
-                (df_raw[common.Headers.spring_autumn].isna() | df_raw[common.Headers.spring_autumn].le(0))
-        )
-
-        df_raw.loc[idx_change, common.Headers.spring_autumn] = common.Seasons.gsp_spring_autumn_val
-
-        idx = (
-                ~df_raw[common.Headers.sub_gsp].isna() &  #
-                ~df_raw[common.Headers.summer].isna() &  #
-                ~df_raw[common.Headers.summer].le(0))  #
-
-        common.Seasons.gsp_summer_val = np.percentile(df_raw.loc[idx, common.Headers.summer], common.Seasons.summer_q)
-
-        idx_change = (
-                ~df_raw[common.Headers.sub_gsp].isna() &
-                (df_raw[common.Headers.summer].isna() | df_raw[common.Headers.summer].le(0))
-        )
-
-        df_raw.loc[idx_change, common.Headers.summer] = common.Seasons.gsp_summer_val
-
-        idx = (
-                ~df_raw[common.Headers.sub_gsp].isna() &  #
-                ~df_raw[common.Headers.min_demand].isna() &  #
-                ~df_raw[common.Headers.min_demand].le(0))  #
-
-        common.Seasons.gsp_min_demand_val = np.percentile(
-            df_raw.loc[idx, common.Headers.summer], common.Seasons.min_demand_q
-        )
-
-        idx_change = (
-                ~df_raw[common.Headers.sub_gsp].isna() &
-                (df_raw[common.Headers.min_demand].isna() | df_raw[common.Headers.min_demand].le(0))
-        )
-
-        df_raw.loc[idx_change, common.Headers.min_demand] = common.Seasons.gsp_min_demand_val
-
-        # assessing primary season load values
-
-        idx = (
-                ~df_raw[common.Headers.sub_primary].isna() &  #
-                ~df_raw[common.Headers.spring_autumn].isna() &  #
-                ~df_raw[common.Headers.spring_autumn].le(0))  #
-
-        common.Seasons.primary_spring_autumn_val = np.percentile(
-            df_raw.loc[idx, common.Headers.spring_autumn], common.Seasons.spring_autumn_q
-        )
-
-        idx_change = (
-                ~df_raw[common.Headers.sub_primary].isna() &
-                (df_raw[common.Headers.spring_autumn].isna() | df_raw[common.Headers.spring_autumn].le(0))
-        )
-
-        df_raw.loc[idx_change, common.Headers.spring_autumn] = common.Seasons.primary_spring_autumn_val
-
-        idx = (
-                ~df_raw[common.Headers.sub_primary].isna() &  #
-                ~df_raw[common.Headers.summer].isna() &  #
-                ~df_raw[common.Headers.summer].le(0))  #
-
-        common.Seasons.primary_summer_val = np.percentile(
-            df_raw.loc[idx, common.Headers.summer], common.Seasons.summer_q
-        )
-
-        idx_change = (
-                ~df_raw[common.Headers.sub_primary].isna() &
-                (df_raw[common.Headers.summer].isna() | df_raw[common.Headers.summer].le(0))
-        )
-
-        df_raw.loc[idx_change, common.Headers.summer] = common.Seasons.primary_summer_val
-
-        idx = (
-                ~df_raw[common.Headers.sub_primary].isna() &  #
-                ~df_raw[common.Headers.min_demand].isna() &  #
-                ~df_raw[common.Headers.min_demand].le(0))  #
-
-        common.Seasons.primary_min_demand_val = np.percentile(
-            df_raw.loc[idx, common.Headers.min_demand], common.Seasons.min_demand_q
-        )
-
-        idx_change = (
-                ~df_raw[common.Headers.sub_primary].isna() &
-                (df_raw[common.Headers.min_demand].isna() | df_raw[common.Headers.min_demand].le(0))
-        )
-
-        df_raw.loc[idx_change, common.Headers.min_demand] = common.Seasons.primary_min_demand_val
+        # Masks for each type of substation and for the season values that are available (non zero and non NA) are
+        # only calculated once and shared by all of the quantile fills
+        columns = list(collections.OrderedDict.fromkeys(x[0] for x in common.Seasons.quantile_fills))
+        row_classes = list(collections.OrderedDict.fromkeys(x[1] for x in common.Seasons.quantile_fills))
+        idx_class = {x: ~df_raw[x].isna() for x in row_classes}
+        idx_available = ~df_raw[columns].isna() & ~df_raw[columns].le(0)
+
+        # Each row is labelled with its type of substation so that the quantiles of every season for every type are
+        # calculated in a single grouped pass for each quantile, values that are not available are excluded
+        row_class = pd.Series(
+            np.select([idx_class[x].values for x in row_classes], row_classes, default=''), index=df_raw.index)
+        in_class = (row_class != '').values
+        df_available = df_raw.loc[in_class, columns].where(idx_available.loc[in_class]).astype(float)
+        grouped = df_available.groupby(row_class[in_class])
+        quantiles = {
+            q: grouped.quantile(q / 100.0) for q in set(x[2] for x in common.Seasons.quantile_fills)}
+
+        # All quantiles are calculated before any values are filled in
+        quantile_values = collections.OrderedDict()
+        for column, row_class, quantile, attribute in common.Seasons.quantile_fills:
+            value = quantiles[quantile].loc[row_class, column]
+            quantile_values[(column, row_class)] = value
+            setattr(common.Seasons, attribute, value)
+
+        for (column, row_class), value in quantile_values.iteritems():
+            df_raw.loc[idx_class[row_class] & ~idx_available[column], column] = value
+            logger.debug('Missing {} values for {} filled with {:.3f}'.format(column, row_class, value))
+
+        common.Seasons.quantile_values = quantile_values
 
     # TODO: @NS (addressed) - Add in a new column that introduces Winter Peak = 1.0 so that if the user selects Winter Peak in
     # TODO: @NS (addressed)... in the GUI it easily allows the user to select the appropriate values
@@ -419,6 +358,7 @@ def season_load_filler(df_raw, fill):
     return df_raw
 
 
+@instrumentation.instrumented
 def bad_data_identifier(df_raw):
     """
 		Function removes all of the rows which do not correspond to the usable data for GSP or Primary substations
@@ -436,86 +376,238 @@ def bad_data_identifier(df_raw):
 
     bad_data = df_raw.loc[idx, :]
     good_data = df_raw.loc[~idx, :]
-    bad_data.to_excel(common.ExcelFileNames.bad_data_excel_name)
-    good_data.to_excel(common.ExcelFileNames.good_data_excel_name)
     return bad_data, good_data
 
 
-def main(xl_path, dill):
+def frame_memory_mb(df):
     """
-		Function
-	:param str xl_path:  Path to raw results file to be imported
-	:param dill:  if true it would dill the dataframes generated in this code
-	:return pd.DataFrame df_return:  DataFrame to return
+		Function returns the memory used by a DataFrame including the contents of any object columns
+	:param pd.DataFrame df:  DataFrame to be measured
+	:return float memory:  Memory used in MB
 	"""
-    local_fill_estimate_list = [False, True]
-    excel_output_name_list = [common.ExcelFileNames.df_raw_excel_name, common.ExcelFileNames.df_modified_excel_name]
+    return df.memory_usage(deep=True).sum() / (1024.0 * 1024.0)
 
-    # Create an empty list to store the results in, the final set is then returned
-    dfs = list()
 
-    # Function loops through twice to produce 2 DataFrames
-    for i in range(len(local_fill_estimate_list)):
-        df = common.import_raw_load_estimates(pth_load_est=xl_path)
+@instrumentation.instrumented
+def compact_dtypes(frames):
+    """
+		Function converts the processed DataFrames to compact data types:
+			flags to bool, repeated names to categories, bus numbers to nullable integers and any remaining numeric
+			object columns to floats
+		Categories are shared by all of the DataFrames so that they can still be compared with each other
+	:param collections.OrderedDict frames:  DataFrames keyed by their dill names
+	:return collections.OrderedDict compact_frames:  Converted DataFrames keyed by their dill names
+	"""
+    # Dtype for each column which is the same for all DataFrames
+    dtypes = dict()
+    for column in frames.values()[0].columns:
+        if column in common.CompactDtypes.flags:
+            dtypes[column] = bool
+        elif column in common.CompactDtypes.categories:
+            values = pd.concat([df[column] for df in frames.values()]).dropna().unique()
+            dtypes[column] = pd.api.types.CategoricalDtype(categories=values)
+        elif column.startswith(common.CompactDtypes.bus_prefix):
+            dtypes[column] = common.CompactDtypes.bus_dtype
+
+    compact_frames = collections.OrderedDict()
+    memory_before = 0.0
+    memory_after = 0.0
+    for name, df in frames.iteritems():
+        memory_before += frame_memory_mb(df)
+        df = df.copy()
+        for column in df.columns:
+            if column in common.CompactDtypes.flags:
+                # Flags are True for the rows they apply to and empty otherwise
+                df[column] = df[column].notna() & (df[column] != False)
+            elif column in dtypes:
+                try:
+                    df[column] = df[column].astype(dtypes[column])
+                except (TypeError, ValueError):
+                    # Bus numbers which are not whole numbers are left as they are
+                    logger.debug('Column {} of {} left as {}'.format(column, name, df[column].dtype))
+            elif df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True) in (
+                    'integer', 'floating', 'mixed-integer-float', 'empty'):
+                df[column] = df[column].astype(common.CompactDtypes.float_dtype)
+        memory_after += frame_memory_mb(df)
+        compact_frames[name] = df
+
+    logger.info('Processed DataFrames reduced from {:.2f} MB to {:.2f} MB by compact data types'.format(
+        memory_before, memory_after))
+    instrumentation.report.add(record=collections.OrderedDict([
+        ('stage', 'memory'),
+        ('before_mb', memory_before),
+        ('after_mb', memory_after)
+    ]))
+
+    return compact_frames
+
+
+def processing_stages(xl_path, fill):
+    """
+		Function returns the stages used to process the load estimate workbook, each stage declares the stages it takes
+		its input from and its parameters so the pipeline only reruns those that have changed
+	:param str xl_path:  Path to raw results file to be imported
+	:param bool fill:  Whether to fill missing values or not
+	:return list stages:  List of stage_pipeline.Stage in the order they should be run
+	"""
+    # Workbook is reimported if it has been modified since it was last read
+    stat = os.stat(xl_path)
+    stages = [
+        stage_pipeline.Stage(
+            name='import', function=common.import_raw_load_estimates, params=dict(pth_load_est=xl_path),
+            fingerprint=(stat.st_size, stat.st_mtime)),
         # Identify whether a GSP or Primary substation for each row
-        # raw_dataframe = common.sse_load_xl_to_df(xl_filename=FILE_PTH_INPUT,
-        # xl_ws_name='MASTER Based on SubstationLoad', headers=True)
-        df = determine_gsp_primary_flag(df_raw=df)
+        stage_pipeline.Stage(
+            name='gsp_primary_flag', function=determine_gsp_primary_flag, inputs=dict(df_raw='import')),
         # Extract aggregate demand for each GSP
-        df = extract_aggregate_demand(df_raw=df)
+        stage_pipeline.Stage(
+            name='aggregate_demand', function=extract_aggregate_demand, inputs=dict(df_raw='gsp_primary_flag')),
         # Assign GSPs
-        df = assign_gsp(df_raw=df)
+        stage_pipeline.Stage(name='assign_gsp', function=assign_gsp, inputs=dict(df_raw='aggregate_demand')),
         # Extract bus percentages as new columns
-        df = bus_percentage_adder_modified(df_raw=df, fill=local_fill_estimate_list[i])
-        df = assign_pf(df_raw=df, fill=local_fill_estimate_list[i])  # Neg added
-
-        df = remove_unnecessary_rows(df_raw=df)
-
+        stage_pipeline.Stage(
+            name='bus_percentages', function=bus_percentage_adder_modified, inputs=dict(df_raw='assign_gsp'),
+            params=dict(fill=fill)),
+        stage_pipeline.Stage(
+            name='assign_pf', function=assign_pf, inputs=dict(df_raw='bus_percentages'), params=dict(fill=fill)),
+        stage_pipeline.Stage(
+            name='remove_rows', function=remove_unnecessary_rows, inputs=dict(df_raw='assign_pf')),
         #  Estimates the missing load values for each year by inter/extrapolation.
-        df = missing_year_load_estimator(df_raw=df, fill=local_fill_estimate_list[i])  # Neg added
-
+        stage_pipeline.Stage(
+            name='missing_years', function=missing_year_load_estimator, inputs=dict(df_raw='remove_rows'),
+            params=dict(fill=fill)),
         # Calculate the diversity factors as new column then fill in the aggregate and actual(divers) loads and assumes
         # divers factor of 1 for GSPs with 0 or NA peak loads
-        df = primary_diverse_load_adder(df_raw=df)  # Neg added
-
+        stage_pipeline.Stage(
+            name='diverse_load', function=primary_diverse_load_adder, inputs=dict(df_raw='missing_years')),
         # Fill in the missing season load values by the quantiles
-        df = season_load_filler(df_raw=df, fill=local_fill_estimate_list[i])  # Neg added
+        stage_pipeline.Stage(
+            name='season_loads', function=season_load_filler, inputs=dict(df_raw='diverse_load'),
+            params=dict(fill=fill))
+    ]
 
-        # Export processed DataFrame
-        file_pth_output = common.get_local_file_path(file_name=excel_output_name_list[i])
-        df.to_excel(file_pth_output)
+    return stages
 
-        dfs.append(df)
 
-    # make an excel file of bad data
-    bad_data, good_data = bad_data_identifier(df)
+def export_to_excel(df, pth):
+    """
+		Function exports a processed DataFrame to an excel workbook
+	:param pd.DataFrame df:  DataFrame to export
+	:param str pth:  Full path to the workbook
+	:return None:
+	"""
+    with instrumentation.stage(name='export {}'.format(os.path.basename(pth)), rows_in=len(df)):
+        df.to_excel(pth)
+
+    return None
 
-    comparison.excel_data_comparison_maker(
-        FILE_NAME_INPUT_1=common.ExcelFileNames.df_raw_excel_name,
-        FILE_NAME_INPUT_2=common.ExcelFileNames.df_modified_excel_name,
-        Bad_Data_Input_Name=common.ExcelFileNames.bad_data_excel_name,
-        Good_Data_Input_Name=common.ExcelFileNames.good_data_excel_name
-    )
+
+def process_load_estimates(xl_path, dill, export_excel=True, output_folder=None):
+    """
+		Function processes the load estimate workbook into the raw and modified DataFrames and the good and bad data,
+		these are handed directly to the data comparison and dill steps with Excel workbooks only written if required.
+		Workbooks are written by export_service.exporter in the background, export_service.exporter.wait() should be
+		called if they are needed straight away
+	:param str xl_path:  Path to raw results file to be imported
+	:param bool dill:  if true it would dill the dataframes generated in this code
+	:param bool export_excel:  (optional=True) - if true the processed DataFrames and the data comparison are also
+								written to Excel workbooks
+	:param str output_folder:  (optional=None) - Folder to write the workbooks, dills and run report to, by default
+								these are written to this folder
+	:return collections.OrderedDict frames:  DataFrames keyed by their dill names
+	"""
+    local_fill_estimate_list = [False, True]
+
+    # Outputs are written to this folder unless another one is provided
+    if output_folder is None:
+        output_folder = os.path.dirname(os.path.realpath(__file__))
+    elif not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    # Create an empty list to store the results in, the final set is then returned
+    dfs = list()
+    instrumentation.report.clear()
+
+    # Function loops through twice to produce 2 DataFrames, the workbook is only parsed once and any stages which
+    # do not depend on whether values are filled are shared by both passes.  The pipeline only lasts for this call so
+    # the outputs it keeps are released once the workbook has been processed, repeated imports of the same workbook
+    # are served by the ingest cache instead
+    pipeline = stage_pipeline.Pipeline()
+    for i in range(len(local_fill_estimate_list)):
+        df = pipeline.run(stages=processing_stages(xl_path=xl_path, fill=local_fill_estimate_list[i]))
+        # Columns that only contain numbers once the rows that are not needed have been removed are converted from
+        # object to numeric types, as they would be if read back from the exported workbook
+        df = df.infer_objects()
+        dfs.append(df)
+
+    # identify the bad data
+    bad_data, good_data = bad_data_identifier(dfs[-1])
+
+    frames = collections.OrderedDict([
+        (common.folder_file_names.dill_raw_data, dfs[0]),
+        (common.folder_file_names.dill_modified_data, dfs[-1]),
+        (common.folder_file_names.dill_good_data_name, good_data),
+        (common.folder_file_names.dill_bad_data_name, bad_data)
+    ])
+    # Only the dills and the returned DataFrames use the compact form, the workbooks are written from the DataFrames
+    # as processed so the flags and names appear in them as they always have
+    compact_frames = compact_dtypes(frames)
+
+    if export_excel:
+        # Export processed DataFrames
+        excel_files = collections.OrderedDict([
+            (common.folder_file_names.dill_raw_data, common.ExcelFileNames.df_raw_excel_name),
+            (common.folder_file_names.dill_modified_data, common.ExcelFileNames.df_modified_excel_name),
+            (common.folder_file_names.dill_good_data_name, common.ExcelFileNames.good_data_excel_name),
+            (common.folder_file_names.dill_bad_data_name, common.ExcelFileNames.bad_data_excel_name)
+        ])
+        # Workbooks are written in the background whilst the rest of the processing continues
+        for variable_name, file_name in excel_files.iteritems():
+            pth = os.path.join(output_folder, file_name)
+            export_service.exporter.submit(pth, export_to_excel, df=frames[variable_name], pth=pth)
+
+        pth = os.path.join(output_folder, common.ExcelFileNames.data_comparison_excel_name)
+        export_service.exporter.submit(
+            pth, comparison.data_comparison_maker,
+            df_main=frames[common.folder_file_names.dill_raw_data],
+            df_modified=frames[common.folder_file_names.dill_modified_data],
+            df_bad_data=frames[common.folder_file_names.dill_bad_data_name],
+            df_good_data=frames[common.folder_file_names.dill_good_data_name],
+            pth_output=pth
+        )
 
     if dill:  # if true it would dill the dataframes generated in this code
+        common.batch_dill_maker_loader_no_xl(
+            variable_value_list=compact_frames.values(), variable_list=compact_frames.keys(),
+            variables_to_be_dilled=[True] * len(frames), load_dill=True,
+            dill_folder_name=os.path.join(output_folder, common.folder_file_names.dill_folder))
+
+    # Report is written once any exports have completed
+    pth = os.path.join(
+        output_folder, '{}{}'.format(constants.Instrumentation.report_name, constants.Instrumentation.extension))
+    export_service.exporter.submit(pth, instrumentation.report.write, pth=pth)
 
-        sheet_list = ['Sheet1', 'Sheet1', 'Sheet1', 'Sheet1']
-        input_list = [common.ExcelFileNames.df_raw_excel_name, common.ExcelFileNames.df_modified_excel_name,
-                      common.ExcelFileNames.good_data_excel_name, common.ExcelFileNames.bad_data_excel_name,
-                      ]
-        variable_list = [common.folder_file_names.dill_raw_data, common.folder_file_names.dill_modified_data,
-                         common.folder_file_names.dill_good_data_name, common.folder_file_names.dill_bad_data_name]
-        variables_to_be_dilled = [True, True, True, True]
-        dill_folder_name = common.folder_file_names.dill_folder
-        load_dill = True  # when True it would try to load the dills for the variable to be dilled that are False
-        variable_dict = common.batch_dill_maker_loader(input_list=input_list, sheet_list=sheet_list,
-                                                       variable_list=variable_list,
-                                                       variables_to_be_dilled=variables_to_be_dilled,
-                                                       load_dill=load_dill,
-                                                       dill_folder_name=dill_folder_name)
+    return compact_frames
+
+
+def main(xl_path, dill, export_excel=True, output_folder=None):
+    """
+		Function
+	:param str xl_path:  Path to raw results file to be imported
+	:param dill:  if true it would dill the dataframes generated in this code
+	:param bool export_excel:  (optional=True) - if true the processed DataFrames and the data comparison are also
+								written to Excel workbooks
+	:param str output_folder:  (optional=None) - Folder to write the workbooks, dills and run report to, by default
+								these are written to this folder
+	:return pd.DataFrame df_return:  DataFrame to return
+	"""
+    frames = process_load_estimates(
+        xl_path=xl_path, dill=dill, export_excel=export_excel, output_folder=output_folder)
+    # Wait for all of the workbooks to be written
+    export_service.exporter.wait()
 
     # DataFrame to return is the last one that was processed
-    df_returned = dfs[-1]
+    df_returned = frames[common.folder_file_names.dill_modified_data]
     return df_returned
 
 
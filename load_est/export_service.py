@@ -0,0 +1,145 @@
+"""
+#######################################################################################################################
+###											Background Export Service												###
+###		Writes Excel workbooks on a background thread so that processing can continue while they are saved		###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import time
+import Queue
+import atexit
+import logging
+import threading
+import collections
+# Unique imports
+import constants as constants
+
+
+class ExportService:
+    """
+        Runs export jobs in the order they are submitted on a single writer thread.  The queue is bounded so that if
+        the exports cannot keep up then submitting another one blocks rather than holding every DataFrame in memory.
+        DataFrames must not be modified once they have been submitted for export.
+    """
+
+    def __init__(self, max_queue=constants.Export.max_queue):
+        """
+            Initialise the service, the writer thread is only started when the first job is submitted
+        :param int max_queue:  (optional) - Maximum number of jobs waiting to be written
+        """
+        self.logger = logging.getLogger(constants.Logging.logger_name)
+        self.queue = Queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self.lock = threading.Lock()
+        # Notified each time a job is completed
+        self.job_done = threading.Condition(self.lock)
+        # Number of jobs still to be completed and number that have failed for each file
+        self.pending = collections.Counter()
+        self.failed = collections.Counter()
+        # Number of jobs that have failed since the last wait
+        self.errors = 0
+
+    @staticmethod
+    def job_key(name):
+        """
+            Function returns the key used to track the jobs for a file so that different forms of the same path match
+        :param str name:  Full path to the file written by the job
+        :return str key:
+        """
+        return os.path.normcase(os.path.realpath(name))
+
+    def start(self):
+        """
+            Function starts the writer thread if it is not already running
+        :return None:
+        """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name=constants.Export.thread_name)
+                # Daemon thread so it never keeps the process alive, wait is registered to run on exit instead
+                self.thread.daemon = True
+                self.thread.start()
+
+        return None
+
+    def run(self):
+        """
+            Function run by the writer thread, any error is logged rather than stopping the thread
+        :return None:
+        """
+        while True:
+            name, function, args, kwargs = self.queue.get()
+            key = self.job_key(name)
+            failed = False
+            try:
+                t0 = time.time()
+                function(*args, **kwargs)
+                self.logger.debug('Export {} completed in {:.2f} seconds'.format(name, time.time() - t0))
+            except Exception:
+                failed = True
+                self.logger.exception('Export {} failed'.format(name))
+            finally:
+                with self.job_done:
+                    if failed:
+                        self.errors += 1
+                        self.failed[key] += 1
+                    self.pending[key] -= 1
+                    if self.pending[key] <= 0:
+                        del self.pending[key]
+                    self.job_done.notify_all()
+                self.queue.task_done()
+
+    def submit(self, name, function, *args, **kwargs):
+        """
+            Function queues a job to be run on the writer thread
+        :param str name:  Full path to the file written by the job, used in any log messages and to wait for it
+        :param function function:  Function that carries out the export
+        :param args:  Arguments for function
+        :param kwargs:  Keyword arguments for function
+        :return None:
+        """
+        self.start()
+        with self.job_done:
+            self.pending[self.job_key(name)] += 1
+        self.queue.put((name, function, args, kwargs))
+
+        return None
+
+    def wait(self, pth=None):
+        """
+            Function blocks until every job submitted so far, or only those writing a single file, has been written
+        :param str pth:  (optional=None) - Full path to a file, if provided only waits for the jobs writing this file
+                            so that it is not opened whilst still being written
+        :return int errors:  Number of jobs that failed, details are in the log
+        """
+        if pth is None:
+            self.queue.join()
+            with self.job_done:
+                errors = self.errors
+                self.errors = 0
+                self.failed.clear()
+        else:
+            key = self.job_key(pth)
+            with self.job_done:
+                while self.pending[key] > 0:
+                    self.job_done.wait()
+                errors = self.failed.pop(key, 0)
+                self.errors -= errors
+
+        if errors:
+            self.logger.error('{} export(s) failed, see the log for details'.format(errors))
+
+        return errors
+
+    # Alias so the barrier can be called either way
+    flush = wait
+
+
+# Service shared by everything that exports workbooks, anything still queued is written before the process exits
+exporter = ExportService()
+atexit.register(exporter.wait)
@@ -26,6 +26,7 @@ from collections import OrderedDict
 import load_est
 import load_est.psse as psse
 import load_est.constants as constants
+import load_est.export_service as export_service
 import Load_Estimates_to_PSSE
 import dataframe_maker_modifier
 
@@ -396,6 +397,8 @@ class MainGUI:
 				load_est.PACKAGE_PATH, '..',
 				constants.XlFileConstants.params_folder,
 				constants.XlFileConstants.xl_checks_file_name))
+			# Workbook may still be being written in the background
+			export_service.exporter.wait(file_path)
 			self.load_complete_lbl_t_f.bind("<Button-1>", lambda e: webbrowser.open_new(file_path))
 			self.load_complete_lbl_t_f.configure(cursor='hand2')
 
@@ -1259,6 +1262,9 @@ class MainGUI:
 					load_est.PACKAGE_PATH, '..',
 					constants.XlFileConstants.params_folder,
 					constants.XlFileConstants.xl_checks_file_name))
+				# Workbook is written in the background when the load estimates are processed so must be complete
+				# before the user can open it
+				export_service.exporter.wait(file_path)
 				self.load_complete_lbl_t_f.bind("<Button-1>", lambda e: webbrowser.open_new(file_path))
 
 			# update GUI variables
@@ -24,6 +24,8 @@ import load_est
 import load_est.psse as psse
 import load_est.constants as constants
 import load_est.dataframe_maker_modifier as dataframe_maker_modifier
+import load_est.ingest_cache as ingest_cache
+import load_est.export_service as export_service
 import load_est.common_functions as common_functions
 import load_est.scale as scale
 
@@ -228,6 +230,10 @@ class MainGUI:
         self.sav_case = str()
         self.psse_con = None
 
+        # Processed load estimate DataFrames for the imported workbook
+        self.ingest_cache = ingest_cache.IngestCache()
+        self.df_good_data = None
+
         # ---------------------------------------- LOAD SCALING OPTIONS:------------------------------------------------
         # Load Options label frame constants
         self.load_labelframe = ttk.LabelFrame()
@@ -408,6 +414,8 @@ class MainGUI:
             #     constants.XlFileConstants.params_folder,
             #     constants.XlFileConstants.xl_checks_file_name)
             file_path = common_functions.get_local_file_path(file_name=constants.General.xl_file_name)
+            # Workbook may still be being written in the background
+            export_service.exporter.wait(file_path)
             # todo:@Ask_David: the following line does not open the excel file
             self.load_complete_lbl_t_f.bind("<Button-1>", lambda e: webbrowser.open_new(file_path))
             self.load_complete_lbl_t_f.configure(cursor='hand2')
@@ -664,10 +672,13 @@ class MainGUI:
 
     def scale_loads_gens(self):
 
-        variable_name = [common_functions.folder_file_names.dill_good_data_name]
-        dill_folder_name = common_functions.folder_file_names.dill_folder
-        df = common_functions.load_dill(variable_name=variable_name, dill_folder_name=dill_folder_name)  # a good_data
-        # dataframe is loaded here
+        # Use the good data for the imported workbook, if nothing imported yet then fall back to the last dilled data
+        if self.df_good_data is not None:
+            df = self.df_good_data
+        else:
+            variable_name = [common_functions.folder_file_names.dill_good_data_name]
+            dill_folder_name = common_functions.folder_file_names.dill_folder
+            df = common_functions.load_dill(variable_name=variable_name, dill_folder_name=dill_folder_name)
         # f_load_values, year = str(), season = str(), diverse = False, zone = tuple(), gsp = tuple()
 
         # if self.load_radio_opt_sel.get() == 1:
@@ -1248,21 +1259,15 @@ class MainGUI:
             filetypes=constants.General.file_types,
             title='Select SSE Load Estimates Spreadsheet'
         )
-        # todo: @ DM: add the function to identify whether a dill exist and if it's newer than the file selected
         if file_path:
             # set load estimates to file path
             load_estimates_xl = file_path
 
-            # process excel file
-            # df_modified = dataframe_maker_modifier.main(load_estimates_xl,
-            #                                             dill=True)  # if dill is true it would dill the dfs
-            # todo:(done below) add one function to load a dilled df_modified
-            df_modified = common_functions.load_dill(
-                variable_name=[common_functions.folder_file_names.dill_modified_data],
-                dill_folder_name=common_functions.folder_file_names.dill_folder)
-            df_bad_data = common_functions.load_dill(
-                variable_name=[common_functions.folder_file_names.dill_bad_data_name],
-                dill_folder_name=common_functions.folder_file_names.dill_folder)
+            # process excel file, only processed if this workbook has not been processed before or has changed
+            frames = self.ingest_cache.load_or_process(xl_path=load_estimates_xl)
+            df_modified = frames[common_functions.folder_file_names.dill_modified_data]
+            df_bad_data = frames[common_functions.folder_file_names.dill_bad_data_name]
+            self.df_good_data = frames[common_functions.folder_file_names.dill_good_data_name]
 
             if len(df_bad_data) > 0:
                 constants.General.loads_complete = False
@@ -1297,6 +1302,9 @@ class MainGUI:
                     load_est.PACKAGE_PATH,
                     common_functions.ExcelFileNames.data_comparison_excel_name))
 
+                # Workbook is written in the background when the load estimates are processed so must be complete
+                # before the user can open it
+                export_service.exporter.wait(file_path)
                 self.load_complete_lbl_t_f.bind("<Button-1>", lambda e: webbrowser.open_new(file_path))
 
             # update GUI variables
@@ -1320,6 +1328,8 @@ class MainGUI:
 
         # Test what option the user provided
         if result == 'yes':
+            # Make sure any workbooks still being exported in the background are written before closing
+            export_service.exporter.wait()
             # Close window
             self.master.destroy()
             self.abort = True
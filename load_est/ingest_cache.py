@@ -0,0 +1,285 @@
+"""
+#######################################################################################################################
+###											Load Estimate Ingest Cache												###
+###		Caches the processed load estimate DataFrames so each workbook only needs to be parsed once					###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import time
+import hashlib
+import tempfile
+import logging
+import collections
+import dill
+# Unique imports
+import common_functions as common
+import constants as constants
+import dataframe_maker_modifier
+import export_service
+
+
+def workbook_key(xl_path):
+    """
+        Function returns the cache key for a workbook based on its path, size, modified time and content so that any
+        change to the workbook results in a different key
+    :param str xl_path:  Full path to the load estimate workbook
+    :return (str, dict) (key, metadata):  Key to use for the cache entry and the details it was based on
+    """
+    xl_path = os.path.abspath(xl_path)
+    stat = os.stat(xl_path)
+
+    # Hash the content in blocks so large workbooks are not read into memory in one go
+    content_hash = hashlib.sha1()
+    with open(xl_path, 'rb') as f:
+        for block in iter(lambda: f.read(common.IngestCacheConstants.hash_block_size), b''):
+            content_hash.update(block)
+
+    metadata = collections.OrderedDict([
+        ('path', os.path.normcase(xl_path)),
+        ('size', stat.st_size),
+        ('mtime', stat.st_mtime),
+        ('content_hash', content_hash.hexdigest()),
+        ('format_version', common.IngestCacheConstants.format_version)
+    ])
+    key = hashlib.sha1(repr(tuple(metadata.values()))).hexdigest()
+
+    return key, metadata
+
+
+def artefact_paths(output_folder=None):
+    """
+        Function returns the full path to each of the outputs written when a workbook is processed
+    :param str output_folder:  (optional=None) - Folder the outputs are written to, defaults to the load_est folder
+    :return collections.OrderedDict paths:  Full path to each output keyed by its path relative to the output folder
+    """
+    if output_folder is None:
+        output_folder = os.path.dirname(os.path.realpath(dataframe_maker_modifier.__file__))
+
+    paths = collections.OrderedDict(
+        (file_name, os.path.join(output_folder, file_name)) for file_name in common.IngestCacheConstants.artefact_files)
+
+    return paths
+
+
+def write_artefact(pth, data):
+    """
+        Function writes an output restored from a cache entry
+    :param str pth:  Full path to write the output to
+    :param bytes data:  Content of the output
+    :return None:
+    """
+    folder = os.path.dirname(pth)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(pth, 'wb') as f:
+        f.write(data)
+
+    return None
+
+
+class IngestCache:
+    """
+        Cache of processed load estimate DataFrames keyed by the workbook they were produced from
+    """
+
+    def __init__(
+            self, cache_folder=None, max_age_days=common.IngestCacheConstants.max_age_days,
+            max_size_mb=common.IngestCacheConstants.max_size_mb
+    ):
+        """
+            Initialise the cache
+        :param str cache_folder:  (optional=None) - Folder to store entries in, defaults to a folder within the dills
+                                    folder
+        :param float max_age_days:  (optional) - Entries not used for longer than this are evicted
+        :param float max_size_mb:  (optional) - Oldest entries are evicted once the cache exceeds this size
+        """
+        self.logger = logging.getLogger(constants.Logging.logger_name)
+
+        if cache_folder is None:
+            cache_folder = common.get_local_file_path_with_folder(
+                file_name=common.IngestCacheConstants.cache_folder,
+                folder_name=common.folder_file_names.dill_folder)
+        self.cache_folder = cache_folder
+        self.max_age = max_age_days * 24.0 * 60.0 * 60.0
+        self.max_size = max_size_mb * 1024.0 * 1024.0
+
+        if not os.path.exists(self.cache_folder):
+            try:
+                os.makedirs(self.cache_folder)
+            except OSError:
+                # Folder may have just been created by another process sharing the cache
+                if not os.path.isdir(self.cache_folder):
+                    raise
+
+    def entry_path(self, key):
+        """
+            Function returns the full path to the cache entry for a key
+        :param str key:  Key returned by workbook_key
+        :return str entry_pth:  Full path to the cache entry
+        """
+        entry_pth = os.path.join(self.cache_folder, '{}{}'.format(key, common.IngestCacheConstants.extension))
+
+        return entry_pth
+
+    def load(self, xl_path):
+        """
+            Function returns the cache entry for a workbook if a valid entry exists
+        :param str xl_path:  Full path to the load estimate workbook
+        :return dict entry:  Cache entry with the DataFrames keyed by their dill names and the outputs keyed by their
+                                path relative to the output folder or None if not cached
+        """
+        key, _ = workbook_key(xl_path=xl_path)
+        entry_pth = self.entry_path(key=key)
+        if not os.path.exists(entry_pth):
+            self.logger.debug('No cached data for workbook {}'.format(xl_path))
+            return None
+
+        try:
+            with open(entry_pth, 'rb') as f:
+                entry = dill.load(f)
+        except (IOError, EOFError, dill.UnpicklingError) as error:
+            self.logger.warning('Unable to read cache entry {} and so it will be rebuilt: {}'.format(entry_pth, error))
+            return None
+
+        # Touch the entry so eviction is based on when it was last used
+        os.utime(entry_pth, None)
+        self.logger.debug('Cached data used for workbook {}'.format(xl_path))
+
+        return entry
+
+    def store(self, xl_path, frames, output_folder=None, written_after=None):
+        """
+            Function stores the DataFrames and outputs for a workbook, the entry is written to a temporary file first
+            and then moved into place so a partially written entry can never be loaded
+        :param str xl_path:  Full path to the load estimate workbook
+        :param collections.OrderedDict frames:  DataFrames keyed by their dill names
+        :param str output_folder:  (optional=None) - Folder the outputs of processing the workbook were written to
+        :param float written_after:  (optional=None) - Time processing started, outputs last modified before this were
+                                        left by an earlier workbook and are not stored
+        :return None:
+        """
+        key, metadata = workbook_key(xl_path=xl_path)
+        entry_pth = self.entry_path(key=key)
+
+        artefacts = collections.OrderedDict()
+        for file_name, pth in artefact_paths(output_folder=output_folder).iteritems():
+            if not os.path.isfile(pth) or (written_after is not None and os.path.getmtime(pth) < written_after):
+                self.logger.warning('Output {} not found and so is not stored in the cache'.format(pth))
+                continue
+            with open(pth, 'rb') as f:
+                artefacts[file_name] = f.read()
+
+        entry = {
+            common.IngestCacheConstants.metadata: metadata,
+            common.IngestCacheConstants.frames: frames,
+            common.IngestCacheConstants.artefacts: artefacts
+        }
+
+        handle, temp_pth = tempfile.mkstemp(dir=self.cache_folder, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                dill.dump(entry, f)
+            # Windows will not rename over an existing file
+            if os.path.exists(entry_pth):
+                os.remove(entry_pth)
+            os.rename(temp_pth, entry_pth)
+        except (IOError, OSError) as error:
+            self.logger.warning('Unable to store cache entry for workbook {}: {}'.format(xl_path, error))
+            if os.path.exists(temp_pth):
+                os.remove(temp_pth)
+
+        self.evict()
+
+        return None
+
+    def restore(self, entry, output_folder=None):
+        """
+            Function writes the outputs stored with a cache entry to the output folder so they are the same as if the
+            workbook had just been processed, they are written by export_service.exporter after any outputs already
+            waiting to be written
+        :param dict entry:  Cache entry returned by load
+        :param str output_folder:  (optional=None) - Folder to write the outputs to, defaults to the load_est folder
+        :return None:
+        """
+        artefacts = entry[common.IngestCacheConstants.artefacts]
+        for file_name, pth in artefact_paths(output_folder=output_folder).iteritems():
+            if file_name in artefacts:
+                export_service.exporter.submit(pth, write_artefact, pth=pth, data=artefacts[file_name])
+
+        return None
+
+    def evict(self):
+        """
+            Function removes entries that have not been used for longer than the maximum age and then the least
+            recently used entries until the cache is within the maximum size
+        :return None:
+        """
+        now = time.time()
+        entries = list()
+        for file_name in os.listdir(self.cache_folder):
+            if not file_name.endswith(common.IngestCacheConstants.extension):
+                continue
+            pth = os.path.join(self.cache_folder, file_name)
+            try:
+                stat = os.stat(pth)
+            except OSError:
+                # Entry removed by another process sharing the cache
+                continue
+            entries.append((stat.st_mtime, stat.st_size, pth))
+
+        # Most recently used first so the oldest are removed once the size limit is reached
+        entries.sort(reverse=True)
+        total_size = 0
+        for mtime, size, pth in entries:
+            total_size += size
+            if now - mtime > self.max_age or total_size > self.max_size:
+                total_size -= size
+                try:
+                    os.remove(pth)
+                except OSError:
+                    continue
+                self.logger.debug('Cache entry {} evicted'.format(pth))
+
+        return None
+
+    def load_or_process(self, xl_path, output_folder=None):
+        """
+            Function returns the processed DataFrames for a workbook either from the cache or, if the workbook has
+            not been processed before or has changed, by processing it and storing the result.  In both cases the
+            outputs are written by export_service.exporter and so export_service.exporter.wait() should be called
+            before they are opened
+        :param str xl_path:  Full path to the load estimate workbook
+        :param str output_folder:  (optional=None) - Folder to write the outputs to, by default these are written to
+                                    the load_est folder
+        :return collections.OrderedDict frames:  DataFrames keyed by their dill names
+        """
+        t0 = time.time()
+        entry = self.load(xl_path=xl_path)
+        if entry is not None:
+            # Outputs of whichever workbook was processed last would otherwise be left in the output folder
+            self.restore(entry=entry, output_folder=output_folder)
+            self.logger.info('Load estimates for {} loaded from cache in {:.3f} seconds'.format(
+                os.path.basename(xl_path), time.time() - t0))
+            return entry[common.IngestCacheConstants.frames]
+
+        processed_frames = dataframe_maker_modifier.process_load_estimates(
+            xl_path=xl_path, dill=True, output_folder=output_folder)
+
+        # Cached DataFrames are the same as those load_dill returns from the dills
+        frames = collections.OrderedDict()
+        for variable_name in common.IngestCacheConstants.cached_variables:
+            frames[variable_name] = common.dill_to_df(df=processed_frames[variable_name].reset_index())
+
+        # Entry is stored once the workbooks submitted while processing have been written so they can be included
+        export_service.exporter.submit(
+            self.entry_path(key=workbook_key(xl_path=xl_path)[0]), self.store,
+            xl_path=xl_path, frames=frames, output_folder=output_folder, written_after=t0)
+        self.logger.info('Load estimates for {} processed and cached in {:.2f} seconds'.format(
+            os.path.basename(xl_path), time.time() - t0))
+
+        return frames
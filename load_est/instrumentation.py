@@ -0,0 +1,225 @@
+"""
+#######################################################################################################################
+###											Stage Instrumentation													###
+###		Records the wall time, CPU time, peak memory and rows processed by each stage of the load estimate ingest	###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import sys
+import time
+import json
+import logging
+import functools
+import collections
+# Unique imports
+import constants as constants
+
+# Peak memory is taken from resource on Linux / macOS and from psutil (if installed) on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Instrumentation is decided once on import so that when it is switched off decorated functions are left untouched
+enabled = os.environ.get(constants.Instrumentation.disable_env, '') in ('', '0')
+
+
+def peak_rss_mb():
+    """
+        Function returns the peak resident memory of this process so far
+    :return float peak:  Peak resident memory in MB or None if it cannot be determined
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports in kB whereas macOS reports in bytes
+        if sys.platform == 'darwin':
+            peak = peak / 1024.0
+        return peak / 1024.0
+    elif psutil is not None:
+        memory_info = psutil.Process().memory_info()
+        return getattr(memory_info, 'peak_wset', memory_info.rss) / (1024.0 * 1024.0)
+    else:
+        return None
+
+
+def count_rows(value):
+    """
+        Function returns the number of rows in a DataFrame, or the total for a list, tuple or dictionary of them
+    :param object value:  Value to count the rows of
+    :return int rows:  Number of rows or None if value does not contain any DataFrames
+    """
+    if isinstance(value, dict):
+        value = value.values()
+    if isinstance(value, (list, tuple)):
+        counts = [x for x in (count_rows(y) for y in value) if x is not None]
+        return sum(counts) if counts else None
+    elif hasattr(value, 'shape') and hasattr(value, 'columns'):
+        return value.shape[0]
+    else:
+        return None
+
+
+class RunReport:
+    """
+        Records of each stage that has been run, written to a JSON file at the end of a run
+    """
+
+    def __init__(self):
+        self.records = list()
+
+    def clear(self):
+        """
+            Function removes the records of any previous run
+        :return None:
+        """
+        del self.records[:]
+
+        return None
+
+    def add(self, record):
+        """
+            Function adds the record for a stage
+        :param collections.OrderedDict record:  Details recorded for the stage
+        :return None:
+        """
+        self.records.append(record)
+
+        return None
+
+    def write(self, pth=None):
+        """
+            Function writes the records to a JSON file
+        :param str pth:  (optional=None) - Full path to the file, defaults to run_report.json in this folder
+        :return str pth:  Full path of the file written or None if instrumentation is switched off
+        """
+        if not enabled:
+            return None
+
+        if pth is None:
+            pth = os.path.join(
+                os.path.dirname(os.path.realpath(__file__)),
+                '{}{}'.format(constants.Instrumentation.report_name, constants.Instrumentation.extension))
+
+        with open(pth, 'w') as f:
+            json.dump(self.records, f, indent=2)
+
+        logging.getLogger(constants.Logging.logger_name).debug('Run report written to {}'.format(pth))
+
+        return pth
+
+
+# Report that all stages are recorded to
+report = RunReport()
+
+
+class Stage:
+    """
+        Context manager that records a single stage, rows_in and rows_out can be set within the block
+    """
+
+    def __init__(self, name, rows_in=None):
+        """
+        :param str name:  Name of the stage
+        :param int rows_in:  (optional=None) - Number of rows the stage starts with
+        """
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.t0 = None
+        self.cpu0 = None
+        self.rss0 = None
+
+    def __enter__(self):
+        self.rss0 = peak_rss_mb()
+        cpu = os.times()
+        self.cpu0 = cpu[0] + cpu[1]
+        self.t0 = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time = time.time() - self.t0
+        cpu = os.times()
+        cpu_time = cpu[0] + cpu[1] - self.cpu0
+        rss = peak_rss_mb()
+        rss_delta = None if rss is None else rss - self.rss0
+
+        record = collections.OrderedDict([
+            ('stage', self.name),
+            ('wall_time', wall_time),
+            ('cpu_time', cpu_time),
+            ('peak_rss_delta_mb', rss_delta),
+            ('rows_in', self.rows_in),
+            ('rows_out', self.rows_out),
+            ('completed', exc_type is None)
+        ])
+        report.add(record=record)
+
+        logging.getLogger(constants.Logging.logger_name).info(
+            'Stage {} took {:.3f} seconds ({:.3f} seconds CPU), peak memory increase {} MB, rows {} -> {}'.format(
+                self.name, wall_time, cpu_time, 'unknown' if rss_delta is None else '{:.1f}'.format(rss_delta),
+                self.rows_in, self.rows_out))
+
+        # Any exception is not suppressed
+        return False
+
+
+class NullStage:
+    """
+        Stands in for Stage when instrumentation is switched off so nothing is recorded
+    """
+    name = None
+    rows_in = None
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+null_stage = NullStage()
+
+
+def stage(name, rows_in=None):
+    """
+        Function returns the context manager used to record a stage
+    :param str name:  Name of the stage
+    :param int rows_in:  (optional=None) - Number of rows the stage starts with
+    :return Stage stage_recorder:  Context manager or a shared NullStage if instrumentation is switched off
+    """
+    if not enabled:
+        return null_stage
+
+    return Stage(name=name, rows_in=rows_in)
+
+
+def instrumented(function):
+    """
+        Decorator that records each call to the function as a stage, rows in are the total rows of any DataFrame
+        arguments and rows out those of the returned value.  If instrumentation is switched off the function is
+        returned unchanged.
+    :param function function:  Function to instrument
+    :return function wrapper:
+    """
+    if not enabled:
+        return function
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        rows_in = count_rows(list(args) + kwargs.values())
+        with Stage(name=function.__name__, rows_in=rows_in) as stage_recorder:
+            output = function(*args, **kwargs)
+            stage_recorder.rows_out = count_rows(output)
+        return output
+
+    return wrapper
@@ -0,0 +1,305 @@
+"""
+#######################################################################################################################
+###											Queued Logging															###
+###		Handlers so log messages are formatted and written on a background thread, a fixed size buffer for the		###
+###		debug log and a helper to collapse messages logged for each item in a loop into a single summary			###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import gzip
+import Queue
+import logging
+import threading
+import collections
+# Unique imports
+import constants as constants
+
+
+class LazyMessage:
+    """
+        Log message which is only formatted when it is written, so that a message logged for every item in a loop costs
+        nothing to format if it is never written (i.e. a DEBUG message which is not dumped from the debug log).  The
+        arguments must not change once logged.
+    """
+    __slots__ = ('msg', 'args')
+
+    def __init__(self, msg, args):
+        """
+        :param str msg:  Message, each {} is replaced by the arguments
+        :param tuple args:  Arguments for the message
+        """
+        self.msg = msg
+        self.args = args
+
+    def __str__(self):
+        return self.msg.format(*self.args)
+
+
+class QueueHandler(logging.Handler):
+    """
+        Handler that puts each log record on a queue for a QueueListener to pass to the handlers that format and write
+        it, equivalent to logging.handlers.QueueHandler in Python 3
+    """
+
+    def __init__(self, queue):
+        """
+        :param Queue.Queue queue:  Queue shared with the QueueListener
+        """
+        logging.Handler.__init__(self)
+        self.queue = queue
+        # Listener for the queue which is stopped if the handler is replaced
+        self.listener = None
+
+    def prepare(self, record):
+        """
+            Function prepares a record to be put on the queue, the message and any exception are converted to text now
+            since the arguments may have changed by the time the record is written.  A LazyMessage is left to be
+            formatted when the record is written.
+        :param logging.LogRecord record:
+        :return logging.LogRecord record:
+        """
+        if not (isinstance(record.msg, LazyMessage) and not record.args):
+            record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def emit(self, record):
+        """
+            Function puts the record on the queue
+        :param logging.LogRecord record:
+        :return None:
+        """
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+        return None
+
+
+class QueueListener:
+    """
+        Takes log records from a queue on a background thread and passes them to each of its handlers whose level they
+        meet, equivalent to logging.handlers.QueueListener in Python 3
+    """
+    # Put on the queue to stop the listener
+    sentinel = None
+
+    def __init__(self, queue, *handlers):
+        """
+        :param Queue.Queue queue:  Queue shared with the QueueHandler
+        :param logging.Handler handlers:  Handlers that format and write the records
+        """
+        self.queue = queue
+        self.handlers = list(handlers)
+        self.thread = None
+
+    def start(self):
+        """
+            Function starts the background thread
+        :return None:
+        """
+        self.thread = threading.Thread(target=self.run, name=constants.Logging.listener_thread_name)
+        # Daemon thread so it never keeps the process alive, stop should be called to write any remaining records
+        self.thread.daemon = True
+        self.thread.start()
+
+        return None
+
+    def handle(self, record):
+        """
+            Function passes a record to each handler whose level it meets
+        :param logging.LogRecord record:
+        :return None:
+        """
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+        return None
+
+    def run(self):
+        """
+            Function run by the background thread until the sentinel is received
+        :return None:
+        """
+        while True:
+            record = self.queue.get()
+            try:
+                if record is self.sentinel:
+                    break
+                self.handle(record)
+            finally:
+                self.queue.task_done()
+
+        return None
+
+    def flush(self):
+        """
+            Function blocks until every record put on the queue so far has been passed to the handlers
+        :return None:
+        """
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+        return None
+
+    def stop(self):
+        """
+            Function writes any records still on the queue and then stops the background thread
+        :return None:
+        """
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(self.sentinel)
+            self.thread.join()
+        self.thread = None
+
+        return None
+
+
+class RingBufferHandler(logging.Handler):
+    """
+        Keeps the most recent records in a fixed size buffer so that memory is capped however long the run is.  Only
+        the values needed to write each record are kept and they are only formatted when the buffer is dumped to a
+        gzip compressed file, which happens when a record at the flush level is received or when dump is called.
+    """
+
+    def __init__(self, pth, capacity=constants.Logging.debug_records, flush_level=logging.CRITICAL):
+        """
+        :param str pth:  Full path to the compressed file, records are added to the end of it each time it is dumped
+        :param int capacity:  (optional) - Number of records kept, older records are discarded
+        :param int flush_level:  (optional=logging.CRITICAL) - Level at which the buffer is dumped
+        """
+        logging.Handler.__init__(self)
+        self.pth = pth
+        self.flush_level = flush_level
+        self.buffer = collections.deque(maxlen=capacity)
+
+    def emit(self, record):
+        """
+            Function adds the record to the buffer and dumps the buffer if it is at the flush level
+        :param logging.LogRecord record:
+        :return None:
+        """
+        try:
+            # A LazyMessage is kept as it is and only formatted if the buffer is dumped
+            msg = record.msg if isinstance(record.msg, LazyMessage) and not record.args else record.getMessage()
+            self.buffer.append((
+                record.name, record.levelno, record.levelname, record.created, record.msecs, msg,
+                record.exc_text, record.funcName, record.lineno))
+            if record.levelno >= self.flush_level:
+                self.dump()
+        except Exception:
+            self.handleError(record)
+
+        return None
+
+    def format_records(self):
+        """
+            Function formats each record in the buffer
+        :return generator lines:  Formatted record
+        """
+        formatter = self.formatter or logging.Formatter()
+        fields = ('name', 'levelno', 'levelname', 'created', 'msecs', 'msg', 'exc_text', 'funcName', 'lineno')
+        for values in list(self.buffer):
+            yield formatter.format(logging.makeLogRecord(dict(zip(fields, values))))
+
+    def dump(self):
+        """
+            Function writes the records in the buffer to the compressed file and empties the buffer
+        :return int records:  Number of records written
+        """
+        self.acquire()
+        try:
+            records = len(self.buffer)
+            if records:
+                with gzip.open(self.pth, 'ab') as f:
+                    for line in self.format_records():
+                        if isinstance(line, unicode):
+                            line = line.encode('utf-8')
+                        f.write(line + '\n')
+                self.buffer.clear()
+        finally:
+            self.release()
+
+        return records
+
+    def flush(self):
+        """
+            Records are only written when the buffer is dumped so that they are not written at the end of every run
+        :return None:
+        """
+        return None
+
+
+class MessageSummary:
+    """
+        Collapses a message that would otherwise be logged for every item in a loop into a single message with the
+        number of items.  The message for each item is still logged at DEBUG so the detail is kept in the debug log.
+        Can be used as a context manager in which case the summary is logged at the end of the block.
+    """
+
+    def __init__(self, logger, summary, level=logging.INFO, max_examples=constants.Logging.summary_examples):
+        """
+        :param logging.Logger logger:  Logger to write the messages to
+        :param str summary:  Summary message, {} is replaced by the number of items
+        :param int level:  (optional=logging.INFO) - Level the summary is logged at
+        :param int max_examples:  (optional) - Number of items listed in the summary
+        """
+        self.logger = logger
+        self.summary = summary
+        self.level = level
+        self.max_examples = max_examples
+        self.count = 0
+        self.examples = list()
+
+    def add(self, item, msg=None, *args):
+        """
+            Function counts an item
+        :param item:  Item the message is for, the first few are listed in the summary
+        :param str msg:  (optional=None) - Detailed message for the item which is logged at DEBUG, if args are provided
+                            each {} is replaced by them when the message is written rather than now
+        :param args:  (optional) - Arguments for msg
+        :return None:
+        """
+        self.count += 1
+        if len(self.examples) < self.max_examples:
+            self.examples.append(item)
+        if msg is not None:
+            if args:
+                msg = LazyMessage(msg, args)
+            self.logger.debug(msg)
+
+        return None
+
+    def log(self):
+        """
+            Function logs the summary if any items have been counted and then starts counting again
+        :return None:
+        """
+        if self.count:
+            examples = ', '.join(str(x) for x in self.examples)
+            if self.count > len(self.examples):
+                examples += ', ...'
+            self.logger.log(self.level, '{} ({})'.format(self.summary.format(self.count), examples))
+
+        self.count = 0
+        self.examples = list()
+
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.log()
+        # Any exception is not suppressed
+        return False
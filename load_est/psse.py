@@ -11,6 +11,8 @@
 
 # Project specific imports
 import load_est.constants as constants
+import load_est.log_handlers as log_handlers
+import load_est.psspy_profiler as psspy_profiler
 # import load_est.load_gen_scale_2 as load_gen_scale
 import common_functions as common
 
@@ -23,6 +25,7 @@ import numpy as np
 import math
 import time
 import re
+import collections
 
 # Version of PSSE that will be initialised
 DEFAULT_PSSE_VERSION = 33
@@ -123,6 +126,8 @@ class InitialisePsspy:
             import redirect
             psspy = reload(psspy)
             redirect = reload(redirect)
+            # Calls are recorded if psspy profiling has been switched on
+            psspy = psspy_profiler.wrap(psspy)
             self.psspy = psspy
 
         except ImportError:
@@ -261,6 +266,110 @@ class InitialisePsspy:
         return self.psse
 
 
+class ChangeJournal:
+    """
+		In-memory journal of the previous values of every load and machine changed through LoadData and MachineData.
+		Allows a scaling step to be reverted by restoring only the elements that changed rather than reloading the
+		SAV case from disk.
+	"""
+    load = 'load'
+    machine = 'machine'
+
+    def __init__(self):
+        self.logger = logging.getLogger(constants.Logging.logger_name)
+
+        # Each entry is a tuple of (element type, (bus, id), previous values)
+        self.entries = list()
+        # Positions in the journal marked by checkpoint(), used by undo()
+        self.checkpoints = list()
+
+    def clear(self):
+        """
+			Empties the journal, called whenever a new SAV case is loaded since previous values no longer apply
+		:return None:
+		"""
+        del self.entries[:]
+        del self.checkpoints[:]
+
+        return None
+
+    def checkpoint(self):
+        """
+			Marks the current position in the journal so that all later changes can be reverted
+		:return int checkpoint:  Position that can be passed to revert_to()
+		"""
+        checkpoint = len(self.entries)
+        self.checkpoints.append(checkpoint)
+
+        return checkpoint
+
+    def record(self, element_type, key, previous):
+        """
+			Records the values an element had before it was changed
+		:param str element_type:  Either ChangeJournal.load or ChangeJournal.machine
+		:param tuple key:  (bus, id) of the element
+		:param tuple previous:  (p, q, status) for loads or (p, q) for machines
+		:return None:
+		"""
+        self.entries.append((element_type, key, previous))
+
+        return None
+
+    def undo(self):
+        """
+			Reverts all the changes made since the most recent checkpoint
+		:return int number_restored:  Number of elements restored
+		"""
+        if self.checkpoints:
+            checkpoint = self.checkpoints.pop()
+        else:
+            checkpoint = 0
+
+        return self.revert_to(checkpoint=checkpoint)
+
+    def revert_to(self, checkpoint=0):
+        """
+			Reverts all the changes made since checkpoint, each element that changed is written back to PSSE once with
+			the value it had at the checkpoint
+		:param int checkpoint:  (optional=0) - Position returned by checkpoint(), 0 reverts back to the loaded case
+		:return int number_restored:  Number of elements restored
+		"""
+        # The first entry for each element after the checkpoint holds the value it had at the checkpoint
+        to_restore = collections.OrderedDict()
+        for element_type, key, previous in self.entries[checkpoint:]:
+            if (element_type, key) not in to_restore:
+                to_restore[(element_type, key)] = previous
+
+        failed = list()
+        for (element_type, (bus, identifier)), previous in to_restore.iteritems():
+            if element_type == self.load:
+                p, q, status = previous
+                ierr = psspy.load_chng_4(i=bus, id=identifier, intgar1=status, realar1=p, realar2=q)
+            else:
+                p, q = previous
+                ierr = psspy.machine_chng_2(i=bus, id=identifier, realar1=p, realar2=q)
+            if ierr > 0:
+                failed.append((element_type, bus, identifier))
+
+        # Journal and checkpoints now reflect the state at the checkpoint
+        del self.entries[checkpoint:]
+        self.checkpoints = [x for x in self.checkpoints if x < checkpoint]
+
+        if failed:
+            msg0 = 'Unable to restore the previous values for the following elements, the SAV case should be reloaded:'
+            msg1 = '\n'.join(['\t - {} at busbar <{}> with ID: {}'.format(*element) for element in failed])
+            self.logger.error('{}\n{}'.format(msg0, msg1))
+
+        number_restored = len(to_restore) - len(failed)
+        self.logger.info('{} loads / machines restored to their previous values'.format(number_restored))
+
+        return number_restored
+
+
+# Single journal shared by all LoadData and MachineData instances
+journal = ChangeJournal()
+
+
 class BusData:
     """
 		Stores busbar data
@@ -477,6 +586,8 @@ class MachineData:
         self.c = constants.Machines
 
         self.df = pd.DataFrame()
+        # Current P and Q values of each machine keyed by (bus, id), used to journal changes
+        self.current_values = dict()
 
         self.update()
 
@@ -503,7 +614,7 @@ class MachineData:
         ierr_cplx, xarray = func_cplx(
             sid=self.sid,
             flag=self.flag,
-            string=(self.c.zsource, 'PQGEN'))
+            string=(self.c.zsource, self.c.pqgen))
         ierr_char, carray = func_char(
             sid=self.sid,
             flag=self.flag,
@@ -523,7 +634,7 @@ class MachineData:
         # Column headers initially in same order as data but then reordered to something more useful for exporting
         # in case needed
         initial_columns = [
-            self.c.bus, self.c.rpos, self.c.xsubtr, self.c.xtrans, self.c.xsynch, self.c.zsource, 'PQGEN',
+            self.c.bus, self.c.rpos, self.c.xsubtr, self.c.xtrans, self.c.xsynch, self.c.zsource, self.c.pqgen,
             self.c.identifier
         ]
 
@@ -536,6 +647,31 @@ class MachineData:
         df[self.c.xsource] = df[self.c.zsource].imag
 
         self.df = df
+        self.current_values = {
+            (int(bus), str(identifier).strip()): (pq.real, pq.imag)
+            for bus, identifier, pq in zip(df[self.c.bus], df[self.c.identifier], df[self.c.pqgen])
+        }
+
+        return None
+
+    def journal_change(self, bus, identifier, p, q):
+        """
+			Records the current P and Q values of a machine in the journal before they are changed to p and q
+		:param int bus:  Busbar number of the machine
+		:param str identifier:  ID of the machine
+		:param float p:  New MW set point
+		:param float q:  New MVAr set point
+		:return None:
+		"""
+        key = (int(bus), str(identifier).strip())
+        if key in self.current_values:
+            journal.record(element_type=journal.machine, key=key, previous=self.current_values[key])
+        else:
+            self.logger.warning(
+                'Machine connected at busbar <{}> with ID: {} is not known and so this change cannot be undone'
+                .format(bus, identifier)
+            )
+        self.current_values[key] = (p, q)
 
         return None
 
@@ -699,7 +835,9 @@ class MachineData:
                 ).format(gen_pd.NUMBER, gen_pd.ID, p, q)
             )
         else:
-            self.logger.info(
+            self.journal_change(bus=gen_pd.NUMBER, identifier=gen_pd.ID, p=p, q=q)
+            # Called for each machine so only included in the debug log, machines_change logs a summary instead
+            self.logger.debug(
                 (
                     'Machine connected at busbar <{}> with ID: {} has had P and Q values changed to '
                     '{:.5f} and {:.5f} based on the scaling percentage of {} % .'
@@ -711,6 +849,63 @@ class MachineData:
 
         return None
 
+    def machines_change(self, df_gens, pc):
+        """
+			Function will change/scale the P and Q values of all the generators in df_gens by pc%.  The new set points
+			are calculated for all machines in one go, machines whose set points would not change are skipped and a
+			single summary is logged rather than a message per machine.
+		:param pd.DataFrame df_gens:  DataFrame of the machines to scale (same format as self.df)
+		:param float pc: percentage value for p and q scaling
+		:return int number_changed:  Number of machines that have been successfully updated
+		"""
+        func_mac_data_change = psspy.machine_chng_2
+
+        # Calculate new set points for all machines
+        pq_gen = df_gens[self.c.pqgen].values.astype(complex)
+        p_new = pq_gen.real * float(pc) / float(100)
+        q_new = pq_gen.imag * float(pc) / float(100)
+
+        # Only those machines where the set point actually changes need to be written to PSSE
+        idx_changed = (p_new != pq_gen.real) | (q_new != pq_gen.imag)
+        buses = df_gens[self.c.bus].values[idx_changed].tolist()
+        identifiers = df_gens[self.c.identifier].values[idx_changed].tolist()
+        p_values = p_new[idx_changed].tolist()
+        q_values = q_new[idx_changed].tolist()
+
+        failed = list()
+        for bus, identifier, p, q in zip(buses, identifiers, p_values, q_values):
+            ierr = func_mac_data_change(
+                i=bus,
+                id=identifier,
+                realar1=p,  # MW set point
+                realar2=q,  # MVAr set point
+            )
+            if ierr > 0:
+                failed.append((bus, identifier, p, q))
+            else:
+                self.journal_change(bus=bus, identifier=identifier, p=p, q=q)
+
+        if failed:
+            msg0 = (
+                'Unable to change the P and Q values for the following machines.  Therefore the overall results '
+                'may not be reliable:'
+            )
+            msg1 = '\n'.join([
+                '\t - Machine connected at busbar <{}> with ID: {} to values of {:.5f} and {:.5f}'.format(*machine)
+                for machine in failed
+            ])
+            self.logger.error('{}\n{}'.format(msg0, msg1))
+
+        number_changed = len(buses) - len(failed)
+        self.logger.info(
+            (
+                '{} of {} machines have had P and Q values changed based on the scaling percentage of {} %, '
+                '{} machines were already at the required values and have been skipped.'
+            ).format(number_changed, len(pq_gen), pc, len(pq_gen) - len(buses))
+        )
+
+        return number_changed
+
 
 class PsseControl:
     """
@@ -847,6 +1042,9 @@ class PsseControl:
 
         self.converted = False
 
+        # Previous values recorded for the old case no longer apply
+        journal.clear()
+
         return None
 
     def save_data_case(self, pth_sav=None):
@@ -1829,6 +2027,8 @@ class LoadData:
 
         self.df = pd.DataFrame()
         # self.loads_to_change = pd.DataFrame()
+        # Current P, Q and status of each load keyed by (bus, id), used to journal changes
+        self.current_values = dict()
 
         # Populate DataFrame
         self.update()
@@ -1841,6 +2041,7 @@ class LoadData:
         # Declare functions
         func_int = psspy.aloadint  # return an array of integer values for subsystem loads
         func_real = psspy.aloadreal  # return an array of real values for subsystem loads
+        func_cplx = psspy.aloadcplx  # return an array of complex values for subsystem loads
         func_char = psspy.aloadchar  # return an array of character values for subsystem loads
 
         # Retrieve data from PSSE
@@ -1852,24 +2053,33 @@ class LoadData:
             sid=self.sid,
             flag=self.flag,
             string=(self.c.load,))
+        ierr_cplx, xarray = func_cplx(
+            sid=self.sid,
+            flag=self.flag,
+            string=(self.c.load_nominal,))
         ierr_char, carray = func_char(
             sid=self.sid,
             flag=self.flag,
             string=(self.c.identifier,))
 
-        if ierr_int > 0 or ierr_char > 0 or ierr_real > 0:
+        if ierr_int > 0 or ierr_char > 0 or ierr_real > 0 or ierr_cplx > 0:
             self.logger.critical(
                 (
                     'Unable to retrieve the load data from the SAV case and PSSE returned the '
-                    'following error codes {}, {} and {} from the functions <{}>, <{}> and <{}>'
-                ).format(ierr_int, ierr_real, ierr_char, func_int.__name__, func_real.__name__, func_char.__name__)
+                    'following error codes {}, {}, {} and {} from the functions <{}>, <{}>, <{}> and <{}>'
+                ).format(
+                    ierr_int, ierr_real, ierr_cplx, ierr_char,
+                    func_int.__name__, func_real.__name__, func_cplx.__name__, func_char.__name__
+                )
             )
             raise SyntaxError('Error importing data from PSSE SAV case')
 
         # Combine data into single list of lists
-        data = iarray + rarray + carray
+        data = iarray + rarray + xarray + carray
         # Column headers initially in same order as data but then reordered to something more useful for exporting
-        initial_columns = [self.c.bus, self.c.status, self.c.zone, self.c.load, self.c.identifier]
+        initial_columns = [
+            self.c.bus, self.c.status, self.c.zone, self.c.load, self.c.load_nominal, self.c.identifier
+        ]
 
         # Transposed so columns in correct location and then columns reordered to something more suitable
         df = pd.DataFrame(data).transpose()
@@ -1878,6 +2088,40 @@ class LoadData:
         # todo: change the ID column values to string
 
         self.df = df
+        self.current_values = {
+            (int(bus), str(identifier).strip()): (pq.real, pq.imag, status)
+            for bus, identifier, pq, status in zip(
+                df[self.c.bus], df[self.c.identifier], df[self.c.load_nominal], df[self.c.status])
+        }
+
+        return None
+
+    def journal_change(self, bus, identifier, p=None, q=None, status=None):
+        """
+			Records the current P, Q and status of a load in the journal before it is changed, any value that is None
+			is left unchanged
+		:param int bus:  Busbar number of the load
+		:param str identifier:  ID of the load
+		:param float p:  (optional=None) - New P load MW
+		:param float q:  (optional=None) - New Q load MVAr
+		:param int status:  (optional=None) - New status of the load
+		:return None:
+		"""
+        key = (int(bus), str(identifier).strip())
+        if key not in self.current_values:
+            self.logger.warning(
+                'PSSE load at busbar <{}> with ID: {} is not known and so this change cannot be undone'
+                .format(bus, identifier)
+            )
+            return None
+
+        previous = self.current_values[key]
+        journal.record(element_type=journal.load, key=key, previous=previous)
+        self.current_values[key] = (
+            previous[0] if p is None else p,
+            previous[1] if q is None else q,
+            previous[2] if status is None else status
+        )
 
         return None
 
@@ -1899,6 +2143,9 @@ class LoadData:
 		:return none:
 		"""
         # logger = logging.getLogger(constants.Logging.logger_name)
+        # A message for each load is only included in the debug log
+        summary = log_handlers.MessageSummary(
+            logger=self.logger, summary='{} PSSE loads updated with new P/Q values')
 
         for i in range(0, len(loads_to_change)):
             ierr = psspy.load_chng_4(
@@ -1919,13 +2166,17 @@ class LoadData:
                              , loads_to_change.loc[i, 'P'], loads_to_change.loc[i, 'Q'])
                 )
             else:
-                self.logger.info((
-                                     'PSSE load bus {} with ID: {} and associated with {} updated with a new P/Q '
-                                     'value of {:.2f}/{:.2f} '
-                                 ).format(loads_to_change.loc[i, 'Bus Number'], constants.Loads.default_id, \
-                                          loads_to_change.loc[i, 'Primary'], loads_to_change.loc[i, 'P'],
-                                          loads_to_change.loc[i, 'Q'])
-                                 )
+                self.journal_change(
+                    bus=loads_to_change.loc[i, 'Bus Number'], identifier=constants.Loads.default_id,
+                    p=loads_to_change.loc[i, 'P'], q=loads_to_change.loc[i, 'Q']
+                )
+                summary.add(
+                    loads_to_change.loc[i, 'Bus Number'],
+                    'PSSE load bus {} with ID: {} and associated with {} updated with a new P/Q '
+                    'value of {:.2f}/{:.2f} ',
+                    loads_to_change.loc[i, 'Bus Number'], constants.Loads.default_id,
+                    loads_to_change.loc[i, 'Primary'], loads_to_change.loc[i, 'P'], loads_to_change.loc[i, 'Q']
+                )
 
             # logger.debug((
             #                  'PSSE busbar {} associated with {} updated with a new P/Q value of {:.2f}/{:.2f}'
@@ -1933,6 +2184,8 @@ class LoadData:
             #                       , loads_to_change.loc[i, 'P'], loads_to_change.loc[i, 'Q'])
             #              )
 
+        summary.log()
+
         return None
 
     def disable_rest_loads(self, loads_id_not_1):
@@ -1941,6 +2194,9 @@ class LoadData:
 		:return none:
 		"""
         #logger = logging.getLogger(constants.Logging.logger_name)
+        # A message for each load is only included in the debug log
+        summary = log_handlers.MessageSummary(
+            logger=self.logger, summary='{} PSSE loads with an ID other than 1 have been disabled')
 
         for i in range(0, len(loads_id_not_1)):
             ierr = psspy.load_chng_4(
@@ -1958,17 +2214,23 @@ class LoadData:
                                           loads_id_not_1.loc[i, constants.Loads.identifier])
                                  )
             else:
-                self.logger.info((
-                                     'PSSE load number {} with ID of {} has been disabled'
-                                 ).format(loads_id_not_1.loc[i, constants.Loads.bus],
-                                          loads_id_not_1.loc[i, constants.Loads.identifier])
-                                 )
+                self.journal_change(
+                    bus=loads_id_not_1.loc[i, constants.Loads.bus],
+                    identifier=loads_id_not_1.loc[i, constants.Loads.identifier], status=0
+                )
+                summary.add(
+                    loads_id_not_1.loc[i, constants.Loads.bus],
+                    'PSSE load number {} with ID of {} has been disabled',
+                    loads_id_not_1.loc[i, constants.Loads.bus], loads_id_not_1.loc[i, constants.Loads.identifier]
+                )
 
             # logger.debug((
             #                  'PSSE load number {} with ID of {} has been disabled'
             #              ).format(loads_id_not_1.loc[i, constants.Loads.bus], loads_id_not_1.loc[i, constants.Loads.identifier])
             #              )
 
+        summary.log()
+
         return None
 
 
@@ -2238,6 +2500,10 @@ class G74FaultInfeed:
         func_bus = psspy.bus_data_3
         func_plant = psspy.plant_data
 
+        # A message for each machine is only included in the debug log
+        summary = log_handlers.MessageSummary(
+            logger=self.logger, summary='Machine parameters successfully updated for {} equivalent machines')
+
         # Loop through every machine and add / update parameters in the PSSE case
         for bus, machine in self.df_machines.iterrows():
             # Check busbar state is the correct type (type codes 2, 3 or 4 do not impact)
@@ -2304,11 +2570,15 @@ class G74FaultInfeed:
                     )
                 )
             else:
-                self.logger.debug(
-                    'Machine parameters successfully updated for equivalent machine connected to busbar: {} with ID {}'
-                        .format(bus, constants.G74.machine_id)
+                summary.add(
+                    bus,
+                    'Machine parameters successfully updated for equivalent machine connected to busbar: {} '
+                    'with ID {}',
+                    bus, constants.G74.machine_id
                 )
 
+        summary.log()
+
 
 class IecFaults:
     """
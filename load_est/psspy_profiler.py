@@ -0,0 +1,244 @@
+"""
+#######################################################################################################################
+###											psspy Call Profiler														###
+###		Records the number of calls, time taken and calling site for each psspy function used during a run			###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import sys
+import time
+import json
+import array
+import atexit
+import logging
+import functools
+import collections
+# Unique imports
+import numpy as np
+import constants as constants
+
+# Recording is decided once on import, when it is switched off the psspy module is used directly
+enabled = os.environ.get(constants.PsspyProfiling.enable_env, '') not in ('', '0')
+
+
+class CallStats:
+    """
+        Calls made to a single psspy function
+    """
+
+    def __init__(self, name):
+        """
+        :param str name:  Name of the psspy function
+        """
+        self.name = name
+        # Time taken by each call in seconds
+        self.times = array.array('d')
+        # Number of calls from each (file, function, line)
+        self.sites = collections.Counter()
+
+    def add(self, duration, site):
+        """
+            Function records a single call
+        :param float duration:  Time taken in seconds
+        :param tuple site:  (file, function, line) the call was made from
+        :return None:
+        """
+        self.times.append(duration)
+        self.sites[site] += 1
+
+        return None
+
+    def record(self):
+        """
+            Function summarises the calls made
+        :return collections.OrderedDict record:
+        """
+        c = constants.PsspyProfiling
+        times = np.frombuffer(self.times, dtype=float) * 1000.0
+        record = collections.OrderedDict([
+            ('function', self.name),
+            ('calls', len(times)),
+            ('total_time', times.sum() / 1000.0),
+            ('mean_ms', times.mean())
+        ])
+        for pc, value in zip(c.percentiles, np.percentile(times, c.percentiles)):
+            record['p{}_ms'.format(pc)] = value
+        record['max_ms'] = times.max()
+        record['sites'] = [
+            collections.OrderedDict([('site', '{}:{} ({})'.format(*site)), ('calls', calls)])
+            for site, calls in self.sites.most_common(c.max_sites)]
+
+        return record
+
+
+class PsspyProfiler:
+    """
+        Stands in for the psspy module, each function is wrapped so that its calls are recorded and anything else is
+        returned from psspy unchanged
+    """
+
+    def __init__(self, module):
+        """
+        :param module module:  psspy module
+        """
+        self.module = module
+        self.stats = collections.OrderedDict()
+        self.wrappers = dict()
+        # Number of calls included in the last report written
+        self.calls_reported = 0
+
+    def set_module(self, module):
+        """
+            Function changes the psspy module being wrapped (i.e. if it has been reloaded), calls recorded so far are kept
+        :param module module:  psspy module
+        :return None:
+        """
+        self.module = module
+        self.wrappers = dict()
+
+        return None
+
+    def wrap_function(self, name, function):
+        """
+            Function returns a wrapper that records each call to the psspy function
+        :param str name:  Name of the psspy function
+        :param function function:  psspy function
+        :return function wrapper:
+        """
+        stats = self.stats.setdefault(name, CallStats(name))
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            caller = sys._getframe(1)
+            site = (os.path.basename(caller.f_code.co_filename), caller.f_code.co_name, caller.f_lineno)
+            t0 = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.add(time.time() - t0, site)
+
+        return wrapper
+
+    def __getattr__(self, name):
+        # Only called for names that are not attributes of the profiler itself
+        value = getattr(self.module, name)
+        if not callable(value):
+            return value
+
+        if name not in self.wrappers:
+            self.wrappers[name] = self.wrap_function(name, value)
+
+        return self.wrappers[name]
+
+    def calls(self):
+        """
+            Function returns the total number of calls recorded
+        :return int calls:
+        """
+        return sum(len(stats.times) for stats in self.stats.values())
+
+    def report(self):
+        """
+            Function summarises the calls made to each psspy function, those which took the longest in total first
+        :return list records:
+        """
+        records = [stats.record() for stats in self.stats.values() if len(stats.times)]
+
+        return sorted(records, key=lambda x: x['total_time'], reverse=True)
+
+    def log_report(self, records=None):
+        """
+            Function writes the summary as a table to the logger
+        :param list records:  (optional=None) - Summary from report, produced if not provided
+        :return None:
+        """
+        if records is None:
+            records = self.report()
+        if not records:
+            return None
+
+        percentiles = ['p{}_ms'.format(pc) for pc in constants.PsspyProfiling.percentiles]
+        lines = ['{:<24}{:>10}{:>12}{}  {}'.format(
+            'psspy function', 'calls', 'total (s)',
+            ''.join('{:>10}'.format(x) for x in ['mean_ms'] + percentiles + ['max_ms']), 'main caller')]
+        for record in records:
+            lines.append('{:<24}{:>10}{:>12.3f}{}  {}'.format(
+                record['function'], record['calls'], record['total_time'],
+                ''.join('{:>10.3f}'.format(record[x]) for x in ['mean_ms'] + percentiles + ['max_ms']),
+                record['sites'][0]['site']))
+
+        logging.getLogger(constants.Logging.logger_name).info(
+            'Calls made to psspy during this run:\n{}'.format('\n'.join(lines)))
+
+        return None
+
+    def write(self, pth=None):
+        """
+            Function writes the summary to the logger and a JSON file
+        :param str pth:  (optional=None) - Full path to the file, defaults to psspy_report.json in this folder
+        :return str pth:  Full path of the file written or None if no calls have been made
+        """
+        records = self.report()
+        if not records:
+            return None
+
+        self.log_report(records=records)
+        self.calls_reported = self.calls()
+
+        if pth is None:
+            pth = os.path.join(
+                os.path.dirname(os.path.realpath(__file__)),
+                '{}{}'.format(constants.PsspyProfiling.report_name, constants.PsspyProfiling.extension))
+
+        with open(pth, 'w') as f:
+            json.dump(records, f, indent=2)
+
+        logging.getLogger(constants.Logging.logger_name).debug('psspy report written to {}'.format(pth))
+
+        return pth
+
+
+# Profiler shared by every psspy handle so that all calls are included in the same report
+profiler = None
+
+
+def wrap(module):
+    """
+        Function returns the handle to use for psspy, if recording is switched on this is the shared profiler wrapping
+        the module and the report is written at the end of the run
+    :param module module:  psspy module
+    :return PsspyProfiler psspy:  Profiler or the module unchanged if recording is switched off
+    """
+    global profiler
+    if not enabled or module is None:
+        return module
+
+    if isinstance(module, PsspyProfiler):
+        return module
+
+    if profiler is None:
+        profiler = PsspyProfiler(module)
+        # Only writes the report if the logger has not already done so as it shut down
+        atexit.register(write_report)
+    else:
+        profiler.set_module(module)
+
+    return profiler
+
+
+def write_report():
+    """
+        Function writes the report for the shared profiler if any calls have been recorded since it was last written,
+        called by the logger before it shuts down so that the table reaches the log files and on exit for any run
+        without the logger
+    :return str pth:  Full path of the report written or None if nothing to report
+    """
+    if profiler is None or profiler.calls() == profiler.calls_reported:
+        return None
+
+    return profiler.write()
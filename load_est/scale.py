@@ -17,6 +17,8 @@ import constants as constants
 import collections
 import load_est
 import load_est.psse as psse
+import load_est.log_handlers as log_handlers
+import logging
 import math
 import time
 import os
@@ -39,6 +41,8 @@ def scale_loads(df_load_values, year=str(), season=str(), diverse=False, zone=tu
 # 	"""
     #
     df = df_load_values
+    # Mark the start of this scaling step so that it can be reverted with psse.journal.undo()
+    psse.journal.checkpoint()
     df = df.loc[df['Sub_Primary'] == 1, :]  # filters the primary buses
     zone_nu = len(list(zone))
     gsp_nu = len(list(gsp))
@@ -113,12 +117,12 @@ def scale_loads(df_load_values, year=str(), season=str(), diverse=False, zone=tu
     loads_in_psse = df_loads.loc[idx == True, :]  # loads in psse that are also filtered by gsp and zones
     k = 1
 
-    if len(loads_not_in_psse) > 0:
-        msg0 = (
-            'The following load buses were not found in PSSE:'
-        )
-        msg1 = '\n'.join((map(str, loads_not_in_psse['Bus Number'])))
-        logger.warning('{}\n{}'.format(msg0, msg1))
+    # A message for each load bus is only included in the debug log
+    logger = logging.getLogger(constants.Logging.logger_name)
+    with log_handlers.MessageSummary(
+            logger=logger, summary='{} load buses were not found in PSSE', level=logging.WARNING) as summary:
+        for bus in loads_not_in_psse['Bus Number']:
+            summary.add(bus, 'Load bus {} was not found in PSSE', bus)
 
         # logger.debug('Warning: the following load buses were not found in psse:')
         # logger.debug('\n'.join(map(str, loads_not_in_psse['Bus Number'])))
@@ -159,6 +163,9 @@ def scale_gens(pc=float(),zone=tuple()):
     :return: None
     """
 
+    # Mark the start of this scaling step so that it can be reverted with psse.journal.undo()
+    psse.journal.checkpoint()
+
     machine_data = psse.MachineData()
     bus_data = psse.BusData()
     machine_data.df['ZONE'] = np.nan
@@ -177,10 +184,9 @@ def scale_gens(pc=float(),zone=tuple()):
     else:
         psse_gens = df_mapped
 
-    for gen in psse_gens.itertuples():
-
-        if gen.RPOS != 999:
-            machine_data.machine_change(gen_pd=gen, pc=pc)
+    # Machines with an RPOS of 999 are not scaled, all remaining machines are scaled in a single batch
+    psse_gens = psse_gens[psse_gens[constants.Machines.rpos] != constants.Machines.rpos_not_scaled]
+    machine_data.machines_change(df_gens=psse_gens, pc=pc)
 
     return None
 
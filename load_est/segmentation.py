@@ -0,0 +1,92 @@
+"""
+#######################################################################################################################
+###											Load Estimate Segmentation												###
+###		Labels each row of the load estimates worksheet with the GSP and station block it belongs to				###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import numpy as np
+import pandas as pd
+# Unique imports
+import constants as constants
+
+
+def format_headers(headers):
+    """
+        Function formats the headers taken from a GSP row of the worksheet
+    :param list headers:  Values in the GSP row
+    :return list headers:  Headers with any unusual characters replaced by ?, surrounding white space and new lines
+                            removed
+    """
+    return [x.encode('ascii', 'replace').strip().replace('\n', '') for x in headers]
+
+
+def segment_blocks(raw_df):
+    """
+        Function labels every row of the worksheet with the GSP and station block it belongs to in a single pass.  Each
+        GSP starts on the row after a row containing GSP in the GSP column and ends the row separation before the next
+        one, within a GSP the first rows are the GSP itself and the rest are fixed size blocks, one for each primary.
+        The headers of raw_df are set from the first GSP row.
+    :param pd.DataFrame raw_df:  Worksheet as imported by sse_load_xl_to_df
+    :return pd.DataFrame labels:  For each row of raw_df (same index) the GSP number, GSP name, row within the GSP and
+                                    block number (0 for the GSP, 1 onwards for the primaries), -1 if the row is not part
+                                    of a GSP
+    """
+    c = constants.XlFileConstants
+    gsp_col = raw_df.iloc[:, c.gsp_col_no]
+
+    # rows with GSP in the GSP column are the headers for each GSP
+    is_header = (gsp_col.str.contains(c.gsp_type) == True).values
+    header_rows = np.flatnonzero(is_header)
+    position = np.arange(len(raw_df.index))
+
+    # each row belongs to the last GSP header above it, the GSP ends the row separation before the next header
+    gsp_id = np.cumsum(is_header) - 1
+    header = np.append(header_rows, len(raw_df.index) + c.row_separation)
+    start = header[gsp_id.clip(0)] + 1
+    end = header[gsp_id.clip(0) + 1] - c.row_separation
+    in_gsp = (gsp_id >= 0) & (position >= start) & (position < end)
+
+    gsp_id = np.where(in_gsp, gsp_id, -1)
+    row = np.where(in_gsp, position - start, -1)
+    block_id = np.where(row < c.bsp_no_rows, 0, (row - c.bsp_no_rows) // c.prim_no_rows + 1)
+    block_id[~in_gsp] = -1
+
+    # GSP name is in the first row of the GSP
+    names = gsp_col.values[start[in_gsp]]
+    gsp_name = np.full(len(raw_df.index), np.nan, dtype=object)
+    gsp_name[in_gsp] = names
+
+    if header_rows.size:
+        raw_df.columns = format_headers(raw_df.iloc[header_rows[0]].to_list())
+
+    labels = pd.DataFrame(
+        data={c.gsp_label: gsp_id, c.gsp_name_label: gsp_name, c.row_label: row, c.block_label: block_id},
+        index=raw_df.index,
+        columns=[c.gsp_label, c.gsp_name_label, c.row_label, c.block_label])
+
+    return labels
+
+
+def stack_gsps(raw_df, labels=None):
+    """
+        Function returns the rows of every GSP in a single DataFrame
+    :param pd.DataFrame raw_df:  Worksheet as imported by sse_load_xl_to_df
+    :param pd.DataFrame labels:  (optional=None) - Labels from segment_blocks, found if not provided
+    :return pd.DataFrame net_df:  Rows of every GSP indexed by GSP name, block and row within the GSP
+    """
+    c = constants.XlFileConstants
+    if labels is None:
+        labels = segment_blocks(raw_df)
+
+    in_gsp = labels[c.gsp_label].values >= 0
+    net_df = raw_df.loc[in_gsp]
+    net_df.index = pd.MultiIndex.from_arrays(
+        [labels[x].values[in_gsp] for x in (c.gsp_name_label, c.block_label, c.row_label)],
+        names=[c.gsp_name_label, c.block_label, c.row_label])
+
+    return net_df
@@ -0,0 +1,128 @@
+"""
+#######################################################################################################################
+###											Memoised Stage Pipeline													###
+###		Runs a chain of DataFrame processing stages and only reruns a stage when its inputs or parameters change	###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import time
+import hashlib
+import logging
+import collections
+# Unique imports
+import constants as constants
+
+
+class Stage:
+    """
+        Single processing stage of a pipeline
+    """
+
+    def __init__(self, name, function, inputs=None, params=None, fingerprint=None):
+        """
+            Initialise the stage
+        :param str name:  Unique name of the stage, used by other stages to refer to its output
+        :param function function:  Function that carries out the stage and returns its output
+        :param dict inputs:  (optional=None) - Keyword argument of function mapped to the name of the stage whose
+                                output it takes
+        :param dict params:  (optional=None) - Any other keyword arguments of function
+        :param tuple fingerprint:  (optional=None) - Extra values that are not passed to function but that mean the
+                                    stage must rerun if they change (i.e. modified time of an input file)
+        """
+        self.name = name
+        self.function = function
+        self.inputs = inputs or dict()
+        self.params = params or dict()
+        self.fingerprint = fingerprint
+
+    def key(self, input_keys):
+        """
+            Function returns the key the output of the stage is cached against based on its parameters and the keys of
+            the stages it takes its inputs from
+        :param dict input_keys:  Key of each of the upstream stages keyed by their name
+        :return str key:  Key for the output of this stage
+        """
+        details = (
+            self.name,
+            self.function.__module__,
+            self.function.__name__,
+            sorted(self.params.items()),
+            self.fingerprint,
+            sorted((arg, input_keys[stage_name]) for arg, stage_name in self.inputs.items())
+        )
+        key = hashlib.sha1(repr(details)).hexdigest()
+
+        return key
+
+
+class Pipeline:
+    """
+        Runs stages in order, caching the output of each one so that it is only rerun if something upstream of it has
+        changed.  Stage functions are expected to modify the DataFrame they are given and so each is given its own copy
+        of its inputs.  Any side effects of a stage (i.e. values saved as class attributes) are not repeated when its
+        cached output is used.
+    """
+
+    def __init__(self, cache_size=2):
+        """
+            Initialise the pipeline
+        :param int cache_size:  (optional=2) - Number of outputs to keep for each stage, by default this is 2 so that
+                                a raw and a filled pass can be alternated without rerunning
+        """
+        self.logger = logging.getLogger(constants.Logging.logger_name)
+        self.cache_size = cache_size
+        # Cached outputs for each stage name, keyed by the stage key
+        self.cache = collections.defaultdict(collections.OrderedDict)
+        # Time taken by each stage in the last run and whether the cached output was used, keyed by the stage name
+        self.timings = collections.OrderedDict()
+
+    def clear(self):
+        """
+            Function removes all of the cached outputs
+        :return None:
+        """
+        self.cache.clear()
+        self.timings.clear()
+
+        return None
+
+    def run(self, stages):
+        """
+            Function runs the stages in the order provided, each stage must come after the stages it takes inputs from
+        :param list stages:  List of Stage objects
+        :return object output:  Copy of the output of the last stage
+        """
+        keys = dict()
+        outputs = dict()
+        self.timings.clear()
+
+        for stage in stages:
+            t0 = time.time()
+            key = stage.key(input_keys=keys)
+            stage_cache = self.cache[stage.name]
+
+            cached = key in stage_cache
+            if cached:
+                output = stage_cache.pop(key)
+            else:
+                kwargs = dict(stage.params)
+                for arg, stage_name in stage.inputs.items():
+                    kwargs[arg] = outputs[stage_name].copy()
+                output = stage.function(**kwargs)
+
+            # Most recently used output is kept at the end so the oldest is removed first
+            stage_cache[key] = output
+            while len(stage_cache) > self.cache_size:
+                stage_cache.popitem(last=False)
+
+            keys[stage.name] = key
+            outputs[stage.name] = output
+            self.timings[stage.name] = (time.time() - t0, cached)
+            self.logger.debug('Stage {} {} in {:.3f} seconds'.format(
+                stage.name, 'loaded from cache' if cached else 'run', self.timings[stage.name][0]))
+
+        return outputs[stages[-1].name].copy()
@@ -0,0 +1,126 @@
+"""
+#######################################################################################################################
+###											Station Validation Results												###
+###		Holds the results of the station checks for a single import of the load estimates							###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import pandas as pd
+
+
+class ValidationResults:
+    """
+        Rows that passed and failed the station checks for one import.  Rows can be added one at a time, in which case
+        they are only combined into a DataFrame when first needed, or as complete DataFrames.  A new object is created
+        for each import so that results from earlier workbooks are released rather than building up.
+    """
+
+    def __init__(self):
+        self.good_rows = list()
+        self.bad_rows = list()
+        self._good_data = None
+        self._bad_data = None
+
+    def add(self, df, passed):
+        """
+            Function adds the row(s) of a station that has been checked
+        :param pd.DataFrame df:  Row(s) for the station including the check columns
+        :param bool passed:  True if the station passed every check
+        :return None:
+        """
+        if passed:
+            self.good_rows.append(df)
+            self._good_data = None
+        else:
+            self.bad_rows.append(df)
+            self._bad_data = None
+
+        return None
+
+    def set_data(self, good_data, bad_data):
+        """
+            Function sets the results when every station has been checked at once
+        :param pd.DataFrame good_data:  Rows that passed the checks
+        :param pd.DataFrame bad_data:  Rows that failed the checks
+        :return None:
+        """
+        self.good_rows = [good_data]
+        self.bad_rows = [bad_data]
+        self._good_data = good_data
+        self._bad_data = bad_data
+
+        return None
+
+    @staticmethod
+    def combine(rows):
+        """
+            Function combines the rows added into a single DataFrame
+        :param list rows:  DataFrames to combine
+        :return pd.DataFrame df:
+        """
+        if not rows:
+            return pd.DataFrame()
+        elif len(rows) == 1:
+            return rows[0]
+        else:
+            return pd.concat(rows, sort=False)
+
+    @property
+    def good_data(self):
+        """
+        :return pd.DataFrame good_data:  Rows that passed the checks
+        """
+        if self._good_data is None:
+            self._good_data = self.combine(self.good_rows)
+            self.good_rows = [self._good_data]
+        return self._good_data
+
+    @property
+    def bad_data(self):
+        """
+        :return pd.DataFrame bad_data:  Rows that failed the checks
+        """
+        if self._bad_data is None:
+            self._bad_data = self.combine(self.bad_rows)
+            self.bad_rows = [self._bad_data]
+        return self._bad_data
+
+    @property
+    def complete(self):
+        """
+        :return bool complete:  True if every station passed the checks
+        """
+        return all(df.empty for df in self.bad_rows)
+
+    def release(self):
+        """
+            Function releases the results so that the memory can be reused
+        :return None:
+        """
+        self.good_rows = list()
+        self.bad_rows = list()
+        self._good_data = None
+        self._bad_data = None
+
+        return None
+
+
+# Results of the most recent import
+current = None
+
+
+def new_run():
+    """
+        Function releases the results of the previous import and returns the results for a new one
+    :return ValidationResults results:
+    """
+    global current
+    if current is not None:
+        current.release()
+    current = ValidationResults()
+
+    return current
@@ -0,0 +1,88 @@
+"""
+#######################################################################################################################
+###											Batch Ingest Tests														###
+###		Checks that every workbook in a batch has its own outputs written to its output folder, including when		###
+###		the workbooks are loaded from the ingest cache by a later batch												###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import sys
+import types
+import shutil
+import tempfile
+import unittest
+
+# psspy is only available within a PSSE installation and is not needed to import the load estimates
+sys.modules.setdefault('psspy', types.ModuleType('psspy'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+# Unique imports
+import load_est.common_functions as common
+import load_est.batch_ingest as batch_ingest
+
+TEST_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'load_est', 'test_files')
+WORKBOOKS = [
+    os.path.join(TEST_FOLDER, '2019-20 SHEPD Load Estimates - v6.xlsx'),
+    os.path.join(TEST_FOLDER, '2019-20 SHEPD Load Estimates - v4.xlsx')
+]
+
+
+def read_comparisons(results):
+    """
+        Function returns the content of the comparison workbook in the output folder of each workbook
+    :param collections.OrderedDict results:  Results returned by batch_ingest
+    :return dict comparisons:  Content of each comparison workbook keyed by the path to the workbook it is for
+    """
+    comparisons = dict()
+    for result in results.values():
+        pth = os.path.join(
+            result[common.BatchIngestConstants.output_folder_key], common.ExcelFileNames.data_comparison_excel_name)
+        with open(pth, 'rb') as f:
+            comparisons[result[common.BatchIngestConstants.xl_path]] = f.read()
+
+    return comparisons
+
+
+@unittest.skipUnless(all(os.path.isfile(x) for x in WORKBOOKS), 'Test load estimates workbooks not available')
+class TestBatchIngest(unittest.TestCase):
+    """
+        Processes the same batch of workbooks twice so that the second batch is loaded from the ingest cache
+    """
+
+    def setUp(self):
+        self.temp_folder = tempfile.mkdtemp()
+        self.cache_folder = os.path.join(self.temp_folder, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_folder, ignore_errors=True)
+
+    def run_batch(self, name):
+        output_folder = os.path.join(self.temp_folder, name)
+        return batch_ingest.batch_ingest(
+            workbooks=WORKBOOKS, output_folder=output_folder, processes=1, cache_folder=self.cache_folder)
+
+    def test_cached_batch_writes_outputs(self):
+        comparisons_first = read_comparisons(results=self.run_batch(name='first'))
+        self.assertNotEqual(comparisons_first[WORKBOOKS[0]], comparisons_first[WORKBOOKS[1]])
+        self.assertEqual(len(os.listdir(self.cache_folder)), len(WORKBOOKS))
+
+        # Second batch is written to new folders so every output must come from the cache
+        results = self.run_batch(name='second')
+        comparisons = read_comparisons(results=results)
+        for xl_path in WORKBOOKS:
+            self.assertTrue(
+                comparisons[xl_path] == comparisons_first[xl_path],
+                'Comparison for {} does not match its workbook'.format(os.path.basename(xl_path)))
+        for result in results.values():
+            for file_name in common.IngestCacheConstants.artefact_files:
+                self.assertTrue(os.path.isfile(
+                    os.path.join(result[common.BatchIngestConstants.output_folder_key], file_name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+#######################################################################################################################
+###											Ingest Cache Tests														###
+###		Checks that the outputs written when a workbook is loaded from the ingest cache are those of that workbook	###
+###		rather than those of whichever workbook was processed last													###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import sys
+import types
+import shutil
+import tempfile
+import unittest
+
+# psspy is only available within a PSSE installation and is not needed to import the load estimates
+sys.modules.setdefault('psspy', types.ModuleType('psspy'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+# Unique imports
+import load_est.common_functions as common
+import load_est.export_service as export_service
+import load_est.ingest_cache as ingest_cache
+
+TEST_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'load_est', 'test_files')
+WORKBOOK_A = os.path.join(TEST_FOLDER, '2019-20 SHEPD Load Estimates - v6.xlsx')
+WORKBOOK_B = os.path.join(TEST_FOLDER, '2019-20 SHEPD Load Estimates - v4.xlsx')
+
+
+def read_outputs(output_folder):
+    """
+        Function returns the content of each output written when a workbook is processed
+    :param str output_folder:  Folder the outputs were written to
+    :return dict outputs:  Content of each output keyed by its path relative to the output folder
+    """
+    export_service.exporter.wait()
+    outputs = dict()
+    for file_name, pth in ingest_cache.artefact_paths(output_folder=output_folder).iteritems():
+        with open(pth, 'rb') as f:
+            outputs[file_name] = f.read()
+
+    return outputs
+
+
+@unittest.skipUnless(
+    os.path.isfile(WORKBOOK_A) and os.path.isfile(WORKBOOK_B), 'Test load estimates workbooks not available')
+class TestIngestCache(unittest.TestCase):
+    """
+        Imports two workbooks and then the first again as the GUI would when the user switches between workbooks
+    """
+
+    def setUp(self):
+        self.temp_folder = tempfile.mkdtemp()
+        self.output_folder = os.path.join(self.temp_folder, 'outputs')
+        self.cache = ingest_cache.IngestCache(cache_folder=os.path.join(self.temp_folder, 'cache'))
+
+    def tearDown(self):
+        export_service.exporter.wait()
+        shutil.rmtree(self.temp_folder, ignore_errors=True)
+
+    def test_cache_hit_restores_outputs(self):
+        self.cache.load_or_process(xl_path=WORKBOOK_A, output_folder=self.output_folder)
+        outputs_a = read_outputs(output_folder=self.output_folder)
+        self.cache.load_or_process(xl_path=WORKBOOK_B, output_folder=self.output_folder)
+        outputs_b = read_outputs(output_folder=self.output_folder)
+
+        # Second import of A is loaded from the cache
+        self.assertTrue(self.cache.load(xl_path=WORKBOOK_A) is not None)
+        self.cache.load_or_process(xl_path=WORKBOOK_A, output_folder=self.output_folder)
+        outputs = read_outputs(output_folder=self.output_folder)
+
+        comparison = common.ExcelFileNames.data_comparison_excel_name
+        self.assertNotEqual(outputs_a[comparison], outputs_b[comparison])
+        self.assertTrue(outputs[comparison] == outputs_a[comparison], 'Linked comparison is not that of workbook A')
+        for file_name in common.IngestCacheConstants.artefact_files:
+            self.assertTrue(outputs[file_name] == outputs_a[file_name], '{} is not that of workbook A'.format(file_name))
+
+
+if __name__ == '__main__':
+    unittest.main()
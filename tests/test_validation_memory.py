@@ -0,0 +1,103 @@
+"""
+#######################################################################################################################
+###											Station Validation Memory Tests											###
+###		Checks that the results of the station checks are released between imports of the load estimates so that	###
+###		memory does not build up when the same session imports many workbooks										###
+###																													###
+###		Code developed as part of PSC project JK7938 - SHEPD - studies and automation								###
+###																													###
+#######################################################################################################################
+"""
+
+# Generic Imports
+import os
+import gc
+import sys
+import types
+import shutil
+import weakref
+import tempfile
+import unittest
+import pandas as pd
+
+# psspy is only available within a PSSE installation and is not needed to import the load estimates
+sys.modules.setdefault('psspy', types.ModuleType('psspy'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+# Unique imports
+import Load_Estimates_to_PSSE as load_estimates
+import load_est.constants as constants
+import load_est.export_service as export_service
+import load_est.validation as validation
+
+TEST_WORKBOOK = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), '..', 'load_est', 'test_files', '2019-20 SHEPD Load Estimates - v6.xlsx')
+# Number of consecutive imports of the workbook
+IMPORTS = 50
+# Imports carried out before the memory in use is first measured so that anything created once is excluded
+WARM_UP_IMPORTS = 5
+# Memory held by DataFrames may only grow by this much between the end of the warm up and the last import
+MAX_GROWTH_MB = 5.0
+
+
+def dataframe_memory():
+    """
+        Function returns the memory used by every DataFrame that is still referenced
+    :return float memory_mb:  Memory in MB
+    """
+    gc.collect()
+    memory = sum(
+        x.memory_usage(index=True, deep=True).sum() for x in gc.get_objects() if isinstance(x, pd.DataFrame))
+
+    return memory / (1024.0 * 1024.0)
+
+
+@unittest.skipUnless(os.path.isfile(TEST_WORKBOOK), 'Test load estimates workbook not available')
+class TestValidationMemory(unittest.TestCase):
+    """
+        Imports the same workbook repeatedly as the GUI would when the user selects several workbooks in one session
+    """
+
+    def setUp(self):
+        # Params and checks workbook are written to a temporary folder rather than alongside the scripts, cur_path is
+        # normally set by the GUI
+        self.cur_path = getattr(constants.General, 'cur_path', None)
+        self.temp_folder = tempfile.mkdtemp()
+        constants.General.cur_path = self.temp_folder
+
+    def tearDown(self):
+        export_service.exporter.wait()
+        if self.cur_path is None:
+            del constants.General.cur_path
+        else:
+            constants.General.cur_path = self.cur_path
+        shutil.rmtree(self.temp_folder, ignore_errors=True)
+
+    def test_results_released_between_imports(self):
+        previous_results = list()
+        memory_warm_up = None
+        for i in range(IMPORTS):
+            load_estimates.process_load_estimates_xl(TEST_WORKBOOK)
+            export_service.exporter.wait()
+
+            results = validation.current
+            # Results of this import are the only ones held
+            gc.collect()
+            for ref in previous_results:
+                self.assertTrue(ref() is None, 'Results of an earlier import still held after import {}'.format(i + 1))
+            self.assertTrue(len(results.good_data) + len(results.bad_data) > 0)
+            previous_results.append(weakref.ref(results.good_data))
+            previous_results.append(weakref.ref(results.bad_data))
+            del results
+
+            if i == WARM_UP_IMPORTS - 1:
+                memory_warm_up = dataframe_memory()
+
+        growth = dataframe_memory() - memory_warm_up
+        self.assertLess(
+            growth, MAX_GROWTH_MB,
+            'DataFrame memory grew by {:.2f} MB over {} imports'.format(growth, IMPORTS - WARM_UP_IMPORTS))
+
+
+if __name__ == '__main__':
+    unittest.main()